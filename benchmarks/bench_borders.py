@@ -0,0 +1,54 @@
+"""
+PDF size and draw time of a dense grid of bordered cells, drawn by FlexItem.draw and by the BatchRenderer, with and
+without collapsed borders, which only the BatchRenderer draws.
+
+    python -m benchmarks.bench_borders [cell count]
+"""
+import sys
+from io import BytesIO
+from timeit import default_timer
+
+from reportlab.pdfgen.canvas import Canvas
+
+from flexbox import FlexBox, FlexItem, FlexWrap, BatchRenderer
+
+
+def grid(count, renderer=None, collapse_borders=False):
+    return FlexBox(
+        *[
+            FlexItem(width="5%", height=8, border=0.5, background_color="#eeeeee" if (i // 20) % 2 else None)
+            for i in range(count)
+        ],
+        flex_wrap=FlexWrap.Wrap,
+        renderer=renderer,
+        collapse_borders=collapse_borders
+    )
+
+
+def draw(box, compress):
+    canvas = Canvas(BytesIO(), pageCompression=compress, invariant=True)
+    start = default_timer()
+    box.drawOn(canvas, 0, 0)
+    draw_time = default_timer() - start
+    canvas.showPage()
+    canvas.save()
+    return draw_time, len(canvas._filename.getvalue())
+
+
+def run(count):
+    print("%-32s %10s %12s %12s" % ("", "draw", "PDF", "compressed"))
+    for name, renderer, collapse_borders in (
+        ("FlexItem.draw", None, False),
+        ("BatchRenderer", BatchRenderer, False),
+        ("BatchRenderer, collapsed", BatchRenderer, True),
+    ):
+        box = grid(count, renderer, collapse_borders)
+        box.wrap(500, 10 ** 6)
+        draw_time = min(draw(box, False)[0] for _ in range(3))
+        size = draw(box, False)[1]
+        compressed = draw(box, True)[1]
+        print("%-32s %7.1f ms %9d B %10d B" % (name, draw_time * 1e3, size, compressed))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
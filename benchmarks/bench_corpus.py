@@ -0,0 +1,263 @@
+"""
+Builds a corpus of realistic documents on the demo templates (invoices, a product catalog with images, label sheets
+and a 500 page statement) and reports, for each, the pages built per second, the peak resident set size of the
+process, the peak of memory allocated by Python (traced in a second build, as tracing slows it down), the size of the
+PDF and the number of wrap calls. Every document is built in a fresh process from data generated with a fixed seed,
+with the images in demo/images, so the results only depend on the code and the machine. Given the JSON of an earlier
+run, prints how the throughput and memory changed.
+
+    python -m benchmarks.bench_corpus [results.json] [baseline.json]
+"""
+import json
+import platform
+import resource
+import sys
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha256
+from io import BytesIO
+from os.path import dirname, join
+from random import Random
+from timeit import default_timer
+
+import reportlab
+from reportlab.lib.enums import TA_RIGHT
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import PageBreak
+
+from demo.common import DemoDocTemplate, DemoFlexBox, DemoFlexItem, h1, h2, spacing
+from flexbox import FlexBox, FlexParagraph, FlexImage, FlexDirection, FlexWrap, AlignItems, JustifyContent, \
+    wrap_cache_info
+
+
+SEED = 1
+
+INVOICES = 60
+PRODUCTS = 240
+LABEL_PAGES = 40
+STATEMENT_ROWS = 26950
+
+IMAGES = [join(dirname(dirname(__file__)), "demo", "images", "GHS%02d.jpg" % number) for number in range(1, 10)]
+
+body = ParagraphStyle("Body", fontSize=8, leading=10)
+right = ParagraphStyle("Right", body, alignment=TA_RIGHT)
+small = ParagraphStyle("Small", fontSize=6, leading=7)
+
+WORDS = ("acetone", "valve", "flange", "gasket", "pump", "sensor", "housing", "bracket", "seal", "filter", "hose",
+         "coupling", "adapter", "cable", "relay", "switch", "panel", "cover", "bolt", "washer")
+STREETS = ("Main Street", "Station Road", "Mill Lane", "Church Street", "High Street", "Park Avenue")
+CITIES = ("Leeds", "Utrecht", "Lyon", "Graz", "Porto", "Turku", "Brno", "Gdansk")
+
+
+def words(random, count):
+    return " ".join(random.choice(WORDS) for _ in range(count))
+
+
+def address(random):
+    return "%s %s<br/>%d %s<br/>%s" % (
+        words(random, 2).title(), random.choice(("Ltd", "GmbH", "B.V.", "S.A.")), random.randint(1, 300),
+        random.choice(STREETS), random.choice(CITIES)
+    )
+
+
+def row(*cells, **kwargs):
+    return FlexBox(
+        *[FlexParagraph(text, style, width=width, padding=(1, 2)) for text, style, width in cells],
+        border=(0, 0, 0.5), border_color="#cccccc", width="100%", align_items=AlignItems.FlexStart, **kwargs
+    )
+
+
+def invoices(random):
+    story = []
+    for number in range(INVOICES):
+        lines = [(words(random, random.randint(2, 12)), random.randint(1, 20), random.randint(100, 50000) / 100)
+                 for _ in range(random.randint(5, 90))]
+        total = sum(quantity * price for _, quantity, price in lines)
+        story.extend([
+            FlexBox(
+                FlexParagraph("Invoice %05d" % (number + 1), h1, width="50%"),
+                DemoFlexBox(FlexParagraph(address(random), body), width="40%"),
+                justify_content=JustifyContent.SpaceBetween, width="100%", margin=(0, 0, spacing * 2)
+            ),
+            row(("Description", h2, "55%"), ("Quantity", h2, "15%"), ("Price", h2, "15%"), ("Amount", h2, "15%")),
+            FlexBox(
+                *[
+                    row((description, body, "55%"), (str(quantity), right, "15%"), ("%.2f" % price, right, "15%"),
+                        ("%.2f" % (quantity * price), right, "15%"))
+                    for description, quantity, price in lines
+                ],
+                flex_direction=FlexDirection.Column, width="100%"
+            ),
+            row(("<b>Total</b>", body, "85%"), ("<b>%.2f</b>" % total, right, "15%"), keep_together=True),
+            PageBreak(),
+        ])
+    return story
+
+
+def catalog(random):
+    return [
+        FlexParagraph("Catalog", h1, padding=(0, 0, spacing)),
+        FlexBox(
+            *[
+                DemoFlexBox(
+                    FlexImage(random.choice(IMAGES), width="30%", max_dpi=150),
+                    FlexBox(
+                        FlexParagraph("<b>%s</b>" % words(random, 2).title(), h2),
+                        FlexParagraph(words(random, random.randint(10, 40)), body),
+                        FlexParagraph("%.2f EUR" % (random.randint(100, 100000) / 100), right),
+                        flex_direction=FlexDirection.Column, width="70%", padding=(0, 0, 0, spacing)
+                    ),
+                    width="50%"
+                )
+                for _ in range(PRODUCTS)
+            ],
+            flex_wrap=FlexWrap.Wrap, width="100%"
+        ),
+    ]
+
+
+def labels(random):
+    return [
+        FlexBox(
+            *[
+                DemoFlexBox(
+                    DemoFlexItem(width="100%", height=4),
+                    FlexParagraph(address(random), body, width="100%"),
+                    FlexParagraph("%08d" % random.randint(0, 10 ** 8), small, width="100%"),
+                    flex_wrap=FlexWrap.Wrap, width="33.3%", height=79
+                )
+                for _ in range(LABEL_PAGES * 24)
+            ],
+            flex_wrap=FlexWrap.Wrap, width="100%"
+        ),
+    ]
+
+
+def statement(random):
+    def transactions():
+        balance = 0
+        for number in range(STATEMENT_ROWS):
+            amount = random.randint(-50000, 50000) / 100
+            balance += amount
+            yield row(
+                ("%04d-%02d-%02d" % (2000 + number // 3000, number // 250 % 12 + 1, number // 10 % 28 + 1), body,
+                 "15%"),
+                (words(random, random.randint(1, 5)), body, "55%"), ("%.2f" % amount, right, "15%"),
+                ("%.2f" % balance, right, "15%")
+            )
+
+    return [
+        FlexBox(
+            FlexParagraph("Statement", h1, width="50%"),
+            DemoFlexBox(FlexParagraph(address(random), body), width="40%"),
+            justify_content=JustifyContent.SpaceBetween, width="100%", margin=(0, 0, spacing * 2)
+        ),
+        row(("Date", h2, "15%"), ("Description", h2, "55%"), ("Amount", h2, "15%"), ("Balance", h2, "15%")),
+        FlexBox(flex_direction=FlexDirection.Column, width="100%", stream=transactions()),
+    ]
+
+
+DOCUMENTS = {
+    "invoices": invoices,
+    "catalog": catalog,
+    "labels": labels,
+    "statement": statement,
+}
+
+
+def build(name):
+    """Build a document of the corpus, returning the time it took, its page count and its PDF."""
+    start = default_timer()
+    story = DOCUMENTS[name](Random(SEED))
+    doc = DemoDocTemplate(name)
+    doc.filename = BytesIO()
+    # Leaves dates and document ids out, the same story always makes the same PDF.
+    doc.invariant = True
+    doc.build(story)
+    return default_timer() - start, doc.page, doc.filename.getvalue()
+
+
+def measure(name):
+    wrap_cache_info.clear()
+    seconds, pages, pdf = build(name)
+    return {
+        "document": name,
+        "pages": pages,
+        "seconds": seconds,
+        "pages_per_second": pages / seconds,
+        # Kilobytes on Linux, bytes on macOS.
+        "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024),
+        "pdf_bytes": len(pdf),
+        "sha256": sha256(pdf).hexdigest(),
+        "wrap_calls": wrap_cache_info.hits + wrap_cache_info.misses,
+        "wraps": wrap_cache_info.misses,
+    }
+
+
+def traced(name):
+    tracemalloc.start()
+    build(name)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def isolated(function, name):
+    # A process of its own, for the peak RSS and the caches to be those of this document alone.
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(function, name).result()
+
+
+def run(output=None, baseline=None):
+    print("%-10s %6s %9s %9s %10s %12s %10s %11s %10s" % (
+        "", "pages", "time", "pages/s", "peak RSS", "tracemalloc", "PDF", "wrap calls", "wraps"
+    ))
+    results = []
+    for name in DOCUMENTS:
+        result = isolated(measure, name)
+        result["peak_traced"] = isolated(traced, name)
+        results.append(result)
+        print("%-10s %6d %7.2f s %9.1f %7.1f MB %9.1f MB %7d kB %11d %10d" % (
+            name, result["pages"], result["seconds"], result["pages_per_second"], result["peak_rss"] / 2 ** 20,
+            result["peak_traced"] / 2 ** 20, result["pdf_bytes"] // 1024, result["wrap_calls"], result["wraps"]
+        ))
+
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "reportlab": reportlab.Version,
+        "seed": SEED,
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+    if baseline:
+        compare(baseline, report)
+    return report
+
+
+def compare(baseline, report):
+    with open(baseline) as file:
+        before = {result["document"]: result for result in json.load(file)["results"]}
+
+    print("\nCompared to %s (> 1 is more):" % baseline)
+    print("%-10s %9s %10s %12s %10s %11s %8s" % (
+        "", "pages/s", "peak RSS", "tracemalloc", "PDF", "wrap calls", "output"
+    ))
+    for result in report["results"]:
+        previous = before.get(result["document"])
+        if previous is not None:
+            print("%-10s %8.2fx %9.2fx %11.2fx %9.2fx %10.2fx %8s" % (
+                result["document"],
+                result["pages_per_second"] / previous["pages_per_second"],
+                result["peak_rss"] / previous["peak_rss"],
+                result["peak_traced"] / previous["peak_traced"],
+                result["pdf_bytes"] / previous["pdf_bytes"],
+                result["wrap_calls"] / previous["wrap_calls"],
+                "same" if result["sha256"] == previous["sha256"] else "changed",
+            ))
+
+
+if __name__ == "__main__":
+    run(*sys.argv[1:3])
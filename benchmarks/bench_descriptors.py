@@ -0,0 +1,72 @@
+"""
+Memory and attribute access cost of the descriptor backed FlexItem attributes.
+
+    python -m benchmarks.bench_descriptors [item count]
+"""
+import gc
+import sys
+import tracemalloc
+from timeit import default_timer
+
+from flexbox import FlexItem
+
+
+def build(count):
+    return [
+        FlexItem(
+            width="50%",
+            height=20,
+            margin=2,
+            border=(1, 0),
+            padding=(2, 4),
+            background_color="#eeeeee",
+            border_color="#000000"
+        )
+        for _ in range(count)
+    ]
+
+
+def read(items):
+    for item in items:
+        item.min_width
+        item.flex_width
+        item.max_height
+        item.margin.top
+        item.padding.left
+        item.frame.width
+        item.background_color
+        item.border_color
+
+
+def run(count):
+    gc.collect()
+    tracemalloc.start()
+    items = build(count)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    gc.collect()
+
+    start = default_timer()
+    items = build(count)
+    build_time = default_timer() - start
+
+    start = default_timer()
+    for _ in range(10):
+        read(items)
+    read_time = default_timer() - start
+
+    start = default_timer()
+    del items
+    gc.collect()
+    release_time = default_timer() - start
+
+    print("items:          %d" % count)
+    print("build:          %.3f s" % build_time)
+    print("memory:         %.1f MiB (%d bytes/item)" % (memory / 2 ** 20, memory / count))
+    print("attribute read: %.3f s (%.0f ns/read)" % (read_time, read_time / (count * 80) * 1e9))
+    print("release + gc:   %.3f s" % release_time)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
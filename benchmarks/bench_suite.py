@@ -0,0 +1,184 @@
+"""
+Times FlexItem.wrap, FlexBox.draw_content, FlexBox.split and FlexMeasurement.parse separately, for trees of several
+shapes, and saves the results as JSON. Drawing is done on a NullCanvas, which measures the items alone. Splitting is
+only timed for the trees that can be split: a single row can't. Given the JSON of an earlier run, prints how much
+faster or slower each benchmark got.
+
+    python -m benchmarks.bench_suite [results.json] [baseline.json]
+"""
+import gc
+import json
+import platform
+import sys
+from functools import partial
+from itertools import count, product
+from statistics import median
+from timeit import default_timer
+
+import reportlab
+
+from flexbox import FlexBox, FlexItem, FlexDirection, FlexWrap
+from flexbox.measurement import FlexMeasurement
+
+
+REPEAT = 5
+
+# Shapes, as (depth, breadth): the boxes nested in each other and the items in each.
+SHAPES = {
+    "deep": (40, 3),
+    "wide": (1, 1000),
+    "grid": (2, 30),
+}
+
+# The width and height of a page, and the most a tree is split at.
+AVAIL_WIDTH = 500
+AVAIL_HEIGHT = 10 ** 6
+SPLIT_HEIGHT = 700
+
+# Literals as they appear in item definitions.
+LITERALS = [None, 0, 1, 2.5, 10, "10", "50%", "33.3%", "100%", 0.5] * 1000
+_runs = count()
+
+
+class NullCanvas:
+    """Accepts every call a canvas (or a path) does and draws nothing."""
+    def __getattr__(self, name):
+        return _nothing
+
+    def beginPath(self):
+        return self
+
+
+def _nothing(*args, **kwargs):
+    pass
+
+
+def tree(depth, breadth, direction, wrap, sizes):
+    def leaf(index):
+        if sizes == "percent":
+            width = "%d%%" % (5 + index % 4 * 5)
+        else:
+            width = 20 + index % 4 * 10
+        return FlexItem(width=width, height=10 + index % 3, border=0.5)
+
+    def box(level):
+        items = [leaf(index) for index in range(breadth)]
+        if level < depth - 1:
+            if depth > breadth:
+                items.append(box(level + 1))
+            else:
+                items = [box(level + 1) for _ in range(breadth)]
+        return FlexBox(*items, flex_direction=direction, flex_wrap=wrap, padding=1)
+
+    return box(0)
+
+
+def cases():
+    for (shape, (depth, breadth)), direction, wrap, sizes in product(
+        SHAPES.items(), (FlexDirection.Row, FlexDirection.Column), (FlexWrap.NoWrap, FlexWrap.Wrap),
+        ("static", "percent")
+    ):
+        name = "%s/%s/%s/%s" % (shape, direction.__name__.lower(), wrap.__name__.lower(), sizes)
+        yield name, partial(tree, depth, breadth, direction, wrap, sizes)
+
+
+def unique_literals():
+    # Different in every run, none of them have been parsed before.
+    offset = next(_runs) * 5000
+    return [(offset + index) / 8 for index in range(5000)] + ["%d%%" % (offset + index) for index in range(5000)]
+
+
+def size(item):
+    return 1 + sum(size(child) for child in getattr(item, "items", ()))
+
+
+def timed(setup, function, repeat):
+    times = []
+    for _ in range(repeat):
+        argument = setup()
+        gc.collect()
+        start = default_timer()
+        function(argument)
+        times.append(default_timer() - start)
+    return min(times), median(times)
+
+
+def wrapped(build):
+    def setup():
+        root = build()
+        root.wrap(AVAIL_WIDTH, AVAIL_HEIGHT)
+        return root
+    return setup
+
+
+def draw_content(root):
+    root.canv = NullCanvas()
+    frame = root.layout.frame
+    root.draw_content(root.width - frame.width, root.height - frame.height, root.content_width, root.content_height)
+    del root.canv
+
+
+def split(root):
+    # Within the tree, for a part of it to be left over for the next page.
+    return root.split(AVAIL_WIDTH, min(SPLIT_HEIGHT, root.height / 2))
+
+
+def benchmarks(repeat):
+    for name, build in cases():
+        items = size(build())
+        yield "wrap", name, items, timed(build, lambda root: root.wrap(AVAIL_WIDTH, AVAIL_HEIGHT), repeat)
+        yield "rewrap", name, items, timed(
+            wrapped(build), lambda root: root.wrap(AVAIL_WIDTH, AVAIL_HEIGHT), repeat
+        )
+        yield "draw_content", name, items, timed(wrapped(build), draw_content, repeat)
+        if split(wrapped(build)()):
+            yield "split", name, items, timed(wrapped(build), split, repeat)
+
+    for name, literals in (("literals", lambda: LITERALS), ("unique", unique_literals)):
+        yield "parse", name, len(literals()), timed(
+            literals, lambda values: [FlexMeasurement.parse(value) for value in values], repeat
+        )
+
+
+def run(output=None, baseline=None, repeat=REPEAT):
+    results = []
+    for benchmark, case, items, (best, middle) in benchmarks(repeat):
+        results.append({
+            "benchmark": benchmark,
+            "case": case,
+            "items": items,
+            "best": best,
+            "median": middle,
+        })
+        print("%-14s %-32s %6d items %10.2f ms %8.2f us/item" % (
+            benchmark, case, items, best * 1e3, best / items * 1e6
+        ))
+
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "reportlab": reportlab.Version,
+        "repeat": repeat,
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+    if baseline:
+        compare(baseline, report)
+    return report
+
+
+def compare(baseline, report):
+    with open(baseline) as file:
+        before = {(result["benchmark"], result["case"]): result["best"] for result in json.load(file)["results"]}
+
+    print("\nCompared to %s (best times, > 1 is slower):" % baseline)
+    for result in report["results"]:
+        key = (result["benchmark"], result["case"])
+        if key in before:
+            print("%-14s %-32s %6.2fx" % (key[0], key[1], result["best"] / before[key]))
+
+
+if __name__ == "__main__":
+    run(*sys.argv[1:3])
@@ -0,0 +1,118 @@
+"""
+Time to build an invoice with FlexBox constructors and by instantiating a compiled template, with and without wrapping
+it, for invoices of several lengths.
+
+    python -m benchmarks.bench_templates [repeat]
+"""
+import gc
+import sys
+from os.path import dirname, join
+from statistics import median
+from timeit import default_timer
+
+from reportlab.lib.styles import ParagraphStyle
+
+from flexbox import FlexBox, FlexItem, FlexParagraph, FlexImage, FlexDirection, AlignItems
+from flexbox.templates import compile_template
+
+
+REPEAT = 20
+LINES = (10, 100, 1000)
+
+AVAIL_WIDTH = 500
+AVAIL_HEIGHT = 10 ** 6
+
+LOGO = join(dirname(dirname(__file__)), "demo", "images", "GHS01.jpg")
+
+body = ParagraphStyle("Body", fontSize=9, leading=11)
+
+SPEC = {
+    "flex_direction": "Column", "margin": 10, "padding": "2%", "items": [
+        {"padding": [4, 8], "border": [0, 0, 1, 0], "border_color": "#888888", "items": [
+            {"type": "paragraph", "text": "Invoice <b>{number}</b>", "style": "body"},
+            {"type": "image", "image": "{logo}", "width": 40, "height": 20},
+        ]},
+        {"type": "box", "flex_direction": "Column", "each": "lines", "items": [
+            {"align_items": "FlexCenter", "background_color": "#eeeeee", "items": [
+                {"type": "paragraph", "text": "{description}", "style": "body", "width": "60%"},
+                {"type": "paragraph", "text": "{quantity} x {currency} {price:.2f}", "style": "body"},
+                {"width": 4, "height": 4, "margin": 1, "background_color": "#e77f24", "align_self": "FlexEnd"},
+            ]},
+        ]},
+    ]
+}
+
+
+def invoice_data(lines, run):
+    # Different in every run, paragraphs aren't laid out from the cache of an earlier one.
+    return {
+        "number": run,
+        "logo": LOGO,
+        "currency": "EUR",
+        "lines": [
+            {"description": "Item %d of run %d" % (index, run), "quantity": index % 7 + 1, "price": index * 1.5}
+            for index in range(lines)
+        ],
+    }
+
+
+def construct(data):
+    return FlexBox(
+        FlexBox(
+            FlexParagraph("Invoice <b>%s</b>" % data["number"], body),
+            FlexImage(data["logo"], width=40, height=20),
+            padding=[4, 8], border=[0, 0, 1, 0], border_color="#888888"
+        ),
+        FlexBox(
+            *[
+                FlexBox(
+                    FlexParagraph(line["description"], body, width="60%"),
+                    FlexParagraph("%s x %s %.2f" % (line["quantity"], data["currency"], line["price"]), body),
+                    FlexItem(width=4, height=4, margin=1, background_color="#e77f24", align_self=AlignItems.FlexEnd),
+                    align_items=AlignItems.FlexCenter, background_color="#eeeeee"
+                )
+                for line in data["lines"]
+            ],
+            flex_direction=FlexDirection.Column
+        ),
+        flex_direction=FlexDirection.Column, margin=10, padding="2%"
+    )
+
+
+def timed(build, wrap, lines, repeat):
+    times = []
+    for run in range(repeat):
+        data = invoice_data(lines, run)
+        gc.collect()
+        start = default_timer()
+        box = build(data)
+        if wrap:
+            box.wrap(AVAIL_WIDTH, AVAIL_HEIGHT)
+        times.append(default_timer() - start)
+    return min(times), median(times)
+
+
+def run(repeat=REPEAT):
+    start = default_timer()
+    template = compile_template(SPEC, styles={"body": body})
+    print("compile_template %.2f ms\n" % ((default_timer() - start) * 1e3))
+
+    print("%6s %-14s %12s %12s %12s %12s" % ("lines", "", "build", "median", "build + wrap", "median"))
+    for lines in LINES:
+        results = {}
+        for name, build in (("constructors", construct), ("template", template.instantiate)):
+            results[name] = timed(build, False, lines, repeat), timed(build, True, lines, repeat)
+            (build_best, build_median), (wrap_best, wrap_median) = results[name]
+            print("%6d %-14s %9.2f ms %9.2f ms %9.2f ms %9.2f ms" % (
+                lines, name, build_best * 1e3, build_median * 1e3, wrap_best * 1e3, wrap_median * 1e3
+            ))
+
+        (construct_build, _), (construct_wrap, _) = results["constructors"]
+        (template_build, _), (template_wrap, _) = results["template"]
+        print("%6s %-14s %11.1fx %12s %11.1fx\n" % (
+            "", "speedup", construct_build / template_build, "", construct_wrap / template_wrap
+        ))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else REPEAT)
@@ -1,4 +1,13 @@
 from flexbox.flex import FlexItem, FlexBox
 from flexbox.flex_flowable import FlexFlowable, FlexParagraph, FlexImage
 from flexbox.options import FlexDirection, JustifyContent, AlignItems, AlignContent, FlexWrap
-from flexbox.measurement import FlexMeasurement, FlexFrame
\ No newline at end of file
+from flexbox.measurement import FlexMeasurement, FlexFrame
+from flexbox.cache import wrap_cache_info
+from flexbox.images import image_size, image_size_info
+from flexbox.loaders import prefetch_images
+from flexbox.paragraphs import paragraph_cache_info, clear_paragraph_cache
+from flexbox.batch import render_document, render_documents
+from flexbox.templates import compile_template
+from flexbox.render import BatchRenderer
+from flexbox.forms import form_cache_info, clear_forms
+from flexbox.display import DisplayList, RecordingCanvas
@@ -0,0 +1,24 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from io import BytesIO
+
+from reportlab.platypus import SimpleDocTemplate
+
+
+def render_document(story, template=SimpleDocTemplate, **kwargs):
+    """Build a story into a PDF and return its bytes. The keyword arguments are passed on to the document template."""
+    output = BytesIO()
+    template(output, **kwargs).build(list(story))
+    return output.getvalue()
+
+
+def render_documents(stories, workers=None, template=SimpleDocTemplate, **kwargs):
+    """
+    Render independent documents on a pool of at most `workers` processes and return the bytes of each PDF, in the
+    order of the stories. Stories are pickled to the workers, so the template and every flowable in them must be
+    picklable: FlexBox trees are, unless their items come from a stream. The caches of each worker are kept for the
+    documents it renders next.
+    """
+    render = partial(render_document, template=template, **kwargs)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(render, stories))
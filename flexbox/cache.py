@@ -0,0 +1,106 @@
+import threading
+
+
+class CacheInfo:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return "CacheInfo(hits=%d, misses=%d)" % (self.hits, self.misses)
+
+
+wrap_cache_info = CacheInfo()
+
+
+class WrapLayout:
+    __slots__ = (
+        "width", "height", "content_width", "content_height", "content_avail", "margin", "border", "frame", "arrangement"
+    )
+
+    def __init__(self, width, height, content_width, content_height, content_avail, margin, border, frame,
+                 arrangement=None):
+        self.width = width
+        self.height = height
+        self.content_width = content_width
+        self.content_height = content_height
+        self.content_avail = content_avail
+        self.margin = margin
+        self.border = border
+        self.frame = frame
+        self.arrangement = arrangement
+
+    def copy(self):
+        # The arrangement refers to the items of a box, not to those of a copy of it.
+        return WrapLayout(
+            self.width, self.height, self.content_width, self.content_height, self.content_avail, self.margin,
+            self.border, self.frame
+        )
+
+
+class WrapCache:
+    # Bumped whenever an item that has already been wrapped is modified. The result of a wrap depends on the whole
+    # subtree, so a change anywhere invalidates the entries of every item (lazily, on their next lookup), in every tree:
+    # trees laid out in parallel are best not modified meanwhile.
+    generation = 0
+
+    # Bumped whenever an item applies a different layout than the one it currently holds. An item whose applied
+    # layout was recorded at the current epoch knows that nothing in its subtree has been re-wrapped since.
+    epoch = 0
+
+    # Both counters are shared by the trees of every thread, and may only ever grow. A tree is wrapped by one thread
+    # at a time.
+    lock = threading.Lock()
+
+    def __init__(self):
+        self.entries = {}
+        self.generation = WrapCache.generation
+        self.key = None
+        self.epoch = None
+
+    def copy(self):
+        """A cache holding copies of the entries of this one, for a copy of its item. Nothing is applied yet."""
+        cache = WrapCache()
+        cache.entries = {key: layout.copy() for key, layout in self.entries.items()}
+        cache.generation = self.generation
+        return cache
+
+    def lookup(self, key):
+        if self.generation != WrapCache.generation:
+            self.entries.clear()
+            self.generation = WrapCache.generation
+            self.key = None
+            self.epoch = None
+
+        return self.entries.get(key)
+
+    def store(self, key, layout):
+        self.entries[key] = layout
+
+    def applied(self, key):
+        return self.key == key and self.epoch == WrapCache.epoch
+
+    def apply(self, key):
+        if self.key != key:
+            self.key = key
+            with WrapCache.lock:
+                WrapCache.epoch += 1
+        self.epoch = WrapCache.epoch
+
+    def invalidate(self):
+        if self.entries:
+            with WrapCache.lock:
+                WrapCache.generation += 1
+            self.entries.clear()
+        self.key = None
+        self.epoch = None
+
+
+def invalidate_wrap(instance):
+    cache = getattr(instance, "wrap_cache", None)
+    if cache is not None:
+        cache.invalidate()
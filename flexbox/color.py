@@ -1,22 +1,22 @@
-from weakref import WeakKeyDictionary
-
 from reportlab.lib.colors import HexColor, toColor
 
 
 class ColorDescriptor:
     def __init__(self, default=None):
-        self.values = WeakKeyDictionary()
+        self.name = None
         self.default = default
 
+    def __set_name__(self, owner, name):
+        self.name = "_%s_value" % name
+
     def __set__(self, instance, value):
-        if value is None:
-            if instance in self.values:
-                del self.values[instance]
-        else:
-            self.values[instance] = toColor(value)
+        setattr(instance, self.name, None if value is None else toColor(value))
 
     def __get__(self, instance, owner):
-        try:
-            return self.values[instance]
-        except KeyError:
+        if instance is None:
+            return self
+
+        value = getattr(instance, self.name, None)
+        if value is None:
             return self.default
+        return value
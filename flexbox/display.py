@@ -0,0 +1,257 @@
+from array import array
+from copy import copy
+
+from flexbox.state import state_canvas
+
+
+# Operations of a display list, each followed by a fixed number of values in its numbers array.
+SAVE, RESTORE, TRANSLATE, FILL_COLOR, STROKE_COLOR, LINE_WIDTH, LINE_JOIN, LINE_CAP, RECT, LINE, MOVE_TO, LINE_TO, \
+    CURVE_TO, PATH_RECT, CLOSE, DRAW_PATH, FLOWABLE, CALL = range(18)
+
+_numbers = {TRANSLATE: 2, LINE_WIDTH: 1, LINE_JOIN: 1, LINE_CAP: 1, RECT: 6, LINE: 4, MOVE_TO: 2, LINE_TO: 2,
+            CURVE_TO: 6, PATH_RECT: 4, DRAW_PATH: 3, FLOWABLE: 2}
+
+# Canvas methods drawing shapes and text or changing the graphics state, recorded as they are called. Methods
+# returning something, such as beginText, can't be recorded.
+RECORDED_METHODS = frozenset((
+    "circle", "ellipse", "wedge", "arc", "roundRect", "bezier", "lines", "grid", "drawString", "drawRightString",
+    "drawCentredString", "drawImage", "drawInlineImage", "setFont", "setDash", "setMiterLimit", "setFillAlpha",
+    "setStrokeAlpha", "setFillColorRGB", "setFillColorCMYK", "setFillGray", "setStrokeColorRGB", "setStrokeColorCMYK",
+    "setStrokeGray", "rotate", "scale", "transform", "skew", "clipPath",
+))
+
+_state_operations = {FILL_COLOR: "fill", STROKE_COLOR: "stroke", LINE_WIDTH: "width", LINE_JOIN: "join",
+                     LINE_CAP: "cap"}
+
+
+class DisplayList:
+    """
+    The operations drawing an item, relative to its bottom left corner, as recorded by a RecordingCanvas. Replay it at
+    any position on any canvas, as often as needed: the items it was recorded from are not used again. Display lists
+    can be pickled, if the flowables in them can, to be recorded in one process and replayed in another.
+    """
+    __slots__ = ("width", "height", "codes", "numbers", "objects")
+
+    def __init__(self, width, height, codes, numbers, objects):
+        self.width = width
+        self.height = height
+        self.codes = codes
+        self.numbers = numbers
+        self.objects = objects
+
+    def __getstate__(self):
+        return self.width, self.height, self.codes, self.numbers, self.objects
+
+    def __setstate__(self, state):
+        self.width, self.height, self.codes, self.numbers, self.objects = state
+
+    def __len__(self):
+        return len(self.codes)
+
+    def replay(self, canv, x=0, y=0):
+        canv = state_canvas(canv)
+        canv.saveState()
+        canv.translate(x, y)
+
+        numbers = self.numbers
+        objects = iter(self.objects)
+        path = None
+        index = 0
+        for code in self.codes:
+            if code == SAVE:
+                canv.saveState()
+            elif code == RESTORE:
+                canv.restoreState()
+            elif code == TRANSLATE:
+                canv.translate(numbers[index], numbers[index + 1])
+            elif code == FILL_COLOR:
+                canv.setFillColor(next(objects))
+            elif code == STROKE_COLOR:
+                canv.setStrokeColor(next(objects))
+            elif code == LINE_WIDTH:
+                canv.setLineWidth(numbers[index])
+            elif code == LINE_JOIN:
+                canv.setLineJoin(int(numbers[index]))
+            elif code == LINE_CAP:
+                canv.setLineCap(int(numbers[index]))
+            elif code == RECT:
+                canv.rect(*numbers[index:index + 4], stroke=int(numbers[index + 4]), fill=int(numbers[index + 5]))
+            elif code == LINE:
+                canv.line(*numbers[index:index + 4])
+            elif code <= CLOSE:
+                # The parts of a path, up to the DRAW_PATH drawing it.
+                if path is None:
+                    path = canv.beginPath()
+                if code == MOVE_TO:
+                    path.moveTo(numbers[index], numbers[index + 1])
+                elif code == LINE_TO:
+                    path.lineTo(numbers[index], numbers[index + 1])
+                elif code == CURVE_TO:
+                    path.curveTo(*numbers[index:index + 6])
+                elif code == PATH_RECT:
+                    path.rect(*numbers[index:index + 4])
+                else:
+                    path.close()
+            elif code == DRAW_PATH:
+                if path is None:
+                    path = canv.beginPath()
+                fill_mode = int(numbers[index + 2])
+                if fill_mode < 0:
+                    canv.drawPath(path, stroke=int(numbers[index]), fill=int(numbers[index + 1]))
+                else:
+                    canv.drawPath(path, stroke=int(numbers[index]), fill=int(numbers[index + 1]), fillMode=fill_mode)
+                path = None
+            elif code == FLOWABLE:
+                draw_flowable(canv, next(objects), numbers[index], numbers[index + 1])
+            else:
+                name, args, kwargs = next(objects)
+                getattr(canv, name)(*args, **kwargs)
+            index += _numbers.get(code, 0)
+
+        canv.restoreState()
+
+
+class RecordingPath:
+    """A path begun on a RecordingCanvas, recorded as it is built."""
+    def __init__(self):
+        self.codes = array("B")
+        self.numbers = array("d")
+
+    def moveTo(self, x, y):
+        self.codes.append(MOVE_TO)
+        self.numbers.extend((x, y))
+
+    def lineTo(self, x, y):
+        self.codes.append(LINE_TO)
+        self.numbers.extend((x, y))
+
+    def curveTo(self, x1, y1, x2, y2, x3, y3):
+        self.codes.append(CURVE_TO)
+        self.numbers.extend((x1, y1, x2, y2, x3, y3))
+
+    def rect(self, x, y, width, height):
+        self.codes.append(PATH_RECT)
+        self.numbers.extend((x, y, width, height))
+
+    def close(self):
+        self.codes.append(CLOSE)
+
+
+class RecordingCanvas:
+    """
+    A canvas recording what is drawn on it into a DisplayList. FlexItems draw their backgrounds and borders with the
+    operations a display list holds, the flowables of FlexFlowables are kept (copied as they are wrapped) to be drawn
+    when it is replayed, and the other drawing methods of the canvas in RECORDED_METHODS are recorded by name.
+
+    Saved states nothing is drawn in are left out, and so are colors, line widths, joins and caps that are set already.
+    """
+    def __init__(self):
+        self.codes = array("B")
+        self.numbers = array("d")
+        self.objects = []
+        # Per saved state, where it starts, whether anything has been drawn in it and the graphics state it has.
+        self.saved = []
+        self.drawn = False
+        self.state = {}
+
+    def __getattr__(self, name):
+        if name not in RECORDED_METHODS:
+            raise AttributeError("'%s' can't be recorded by a RecordingCanvas" % name)
+
+        def record(*args, **kwargs):
+            self.record(CALL, (), ((name, args, kwargs),))
+            if not name.startswith("draw"):
+                # What they change isn't known.
+                self.state = {}
+        return record
+
+    def display_list(self, width=0, height=0):
+        return DisplayList(width, height, self.codes, self.numbers, self.objects)
+
+    def record(self, code, numbers=(), objects=(), drawn=True):
+        self.codes.append(code)
+        self.numbers.extend(numbers)
+        self.objects.extend(objects)
+        self.drawn = self.drawn or drawn
+
+    def set_state(self, code, value, numbers=(), objects=()):
+        name = _state_operations[code]
+        if name not in self.state or self.state[name] != value:
+            self.state[name] = value
+            self.record(code, numbers, objects, drawn=False)
+
+    def saveState(self):
+        self.saved.append((len(self.codes), len(self.numbers), len(self.objects), self.drawn, self.state))
+        self.state = dict(self.state)
+        self.drawn = False
+        self.codes.append(SAVE)
+
+    def restoreState(self):
+        codes, numbers, objects, drawn, self.state = self.saved.pop()
+        if not self.drawn:
+            del self.codes[codes:]
+            del self.numbers[numbers:]
+            del self.objects[objects:]
+        else:
+            self.codes.append(RESTORE)
+        self.drawn = self.drawn or drawn
+
+    def translate(self, dx, dy):
+        if dx or dy:
+            self.record(TRANSLATE, (dx, dy), drawn=False)
+
+    def setFillColor(self, color, alpha=None):
+        if alpha is not None:
+            self.record(CALL, (), (("setFillColor", (color, alpha), {}),), drawn=False)
+            self.state.pop("fill", None)
+        else:
+            self.set_state(FILL_COLOR, color, objects=(color,))
+
+    def setStrokeColor(self, color, alpha=None):
+        if alpha is not None:
+            self.record(CALL, (), (("setStrokeColor", (color, alpha), {}),), drawn=False)
+            self.state.pop("stroke", None)
+        else:
+            self.set_state(STROKE_COLOR, color, objects=(color,))
+
+    def setLineWidth(self, width):
+        self.set_state(LINE_WIDTH, width, (width,))
+
+    def setLineJoin(self, mode):
+        self.set_state(LINE_JOIN, mode, (mode,))
+
+    def setLineCap(self, mode):
+        self.set_state(LINE_CAP, mode, (mode,))
+
+    def rect(self, x, y, width, height, stroke=1, fill=0):
+        self.record(RECT, (x, y, width, height, bool(stroke), bool(fill)))
+
+    def line(self, x1, y1, x2, y2):
+        self.record(LINE, (x1, y1, x2, y2))
+
+    def beginPath(self):
+        return RecordingPath()
+
+    def drawPath(self, path, stroke=1, fill=0, fillMode=None):
+        self.codes.extend(path.codes)
+        self.numbers.extend(path.numbers)
+        self.record(DRAW_PATH, (bool(stroke), bool(fill), -1 if fillMode is None else fillMode))
+
+    def drawFlowable(self, flowable, x, y):
+        # The flowable is wrapped again when the item it belongs to is, the copy keeps the size it has now.
+        self.record(FLOWABLE, (x, y), (copy(flowable),))
+
+
+def record(item):
+    """The display list of a wrapped FlexItem."""
+    canv = RecordingCanvas()
+    item.drawOn(canv, 0, 0)
+    return canv.display_list(float(item.width), float(item.height))
+
+
+def draw_flowable(canv, flowable, x, y):
+    """Draw a flowable, or record it to be drawn when a display list recorded on the canvas is replayed."""
+    if isinstance(canv, RecordingCanvas):
+        canv.drawFlowable(flowable, x, y)
+    else:
+        flowable.drawOn(canv, x, y)
@@ -1,10 +1,20 @@
-from fortnum import FortnumDescriptor
+from copy import copy
+from itertools import islice
+
 from reportlab.lib.colors import HexColor
 from reportlab.platypus import Flowable
 
+from flexbox.cache import WrapCache, WrapLayout, invalidate_wrap, wrap_cache_info
 from flexbox.color import ColorDescriptor
-from flexbox.measurement import FlexMeasurementDescriptor, FlexMeasurement, FlexFrameDescriptor, FlexFrame
-from flexbox.options import FlexDirection, JustifyContent, AlignItems, AlignContent, FlexWrap
+from flexbox.measurement import FlexMeasurementDescriptor, FlexMeasurement, FlexFrameDescriptor
+from flexbox.options import FlexDirection, JustifyContent, AlignItems, AlignContent, AlignSelf, FlexWrap, \
+    OptionDescriptor
+from flexbox.rows import FlexArrangement, FlexPages, FlexRow, measure_rows
+from flexbox.forms import draw_form, keyed_drawing
+from flexbox.state import state_canvas
+
+
+black = HexColor(0x000000)
 
 
 class FlexItem(Flowable):
@@ -19,15 +29,29 @@ class FlexItem(Flowable):
     background_color = ColorDescriptor()
     border_color = ColorDescriptor()
 
+    align_self = OptionDescriptor("align_self", AlignSelf, allow_none=True)
+
     margin = FlexFrameDescriptor()
     border = FlexFrameDescriptor()
     padding = FlexFrameDescriptor()
     frame = FlexFrameDescriptor()
 
+    wrap_cache = None
+    # Sides of the border (top, right, bottom, left) that are not drawn, set by the box drawing the item.
+    hidden_border = None
+
+    # Attributes derived by wrap and drawOn. They are left out when an item is pickled or copied and rebuilt by the
+    # first wrap after it is restored.
+    transient_state = ("wrap_cache", "layout", "width", "height", "content_width", "content_height", "content_avail",
+                       "canv", "_frame")
+
     def __init__(self, min_width=None, width=None, max_width=None, min_height=None, height=None, max_height=None,
-                 margin=None, border=None, padding=None, background_color=None, border_color=None, align_self=None):
+                 margin=None, border=None, padding=None, background_color=None, border_color=None, align_self=None,
+                 static=False, form=False):
         super().__init__()
 
+        self.wrap_cache = WrapCache()
+
         self.min_width = min_width
         self.flex_width = width
         self.max_width = max_width
@@ -39,131 +63,203 @@ class FlexItem(Flowable):
         self.margin = margin
         self.border = border
         self.padding = padding
-        self.frame = FlexFrame(
-            self.margin.top + self.border.top + self.padding.top,
-            self.margin.right + self.border.right + self.padding.right,
-            self.margin.bottom + self.border.bottom + self.padding.bottom,
-            self.margin.left + self.border.left + self.padding.left
-        )
+        self.frame = self.margin + self.border + self.padding
 
         self.background_color = background_color
         self.border_color = border_color
 
         self.content_width = None
         self.content_height = None
+        self.content_avail = None
+        self.layout = None
 
         self.align_self = align_self
 
+        # The item and everything in it are the same in every clone, so clones keep its measurements.
+        self.static = static
+        # Drawn once per document as a form XObject, and placed wherever the same item is drawn again. See form_key.
+        self.form = form
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self.transient_state:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.wrap_cache = WrapCache()
+        self.layout = None
+        self.width = self.height = 0
+        self.content_width = self.content_height = self.content_avail = None
+
+    def clone(self):
+        """
+        Copy the item and its subtree. Copies share the measurements, frames, colors and options of the original, which
+        are immutable. Static items also keep the layouts they have been wrapped to, so wrapping a copy only measures
+        the parts that are not static.
+        """
+        return self.clone_item(self.static)
+
+    def clone_item(self, static):
+        item = self.__class__.__new__(self.__class__)
+        item.__setstate__(self.__getstate__())
+        if static:
+            item.wrap_cache = self.wrap_cache.copy()
+        return item
+
     def wrap(self, avail_width, avail_height):
-        for measurement in (self.min_width, self.flex_width, self.max_width):
-            measurement.base = avail_width
-        for measurement in (self.min_height, self.flex_height, self.max_height):
-            measurement.base = avail_height
+        key = (avail_width, avail_height)
+        layout = self.wrap_cache.lookup(key)
+
+        if layout is None:
+            wrap_cache_info.misses += 1
+            layout = self.measure(avail_width, avail_height)
+            self.wrap_cache.store(key, layout)
+            self.apply_layout(layout)
+        else:
+            wrap_cache_info.hits += 1
+            if self.wrap_cache.applied(key):
+                return self.width, self.height
 
-        width = float(FlexMeasurement.min(self.max_width, self.flex_width) or avail_width)
-        height = float(FlexMeasurement.min(self.max_height, self.flex_height) or avail_height)
+            if self.wrap_cache.key == key:
+                self.refresh_content(*layout.content_avail)
+            else:
+                self.restore(layout)
 
-        # frame_width = self.padding.width + self.margin.width + self.border.width
-        # frame_height = self.padding.height + self.margin.height + self.border.height
+        self.wrap_cache.apply(key)
+        return self.width, self.height
 
-        self.frame.width.base = width
-        self.frame.height.base = height
+    def invalidate_wrap(self):
+        self.wrap_cache.invalidate()
 
-        content_width, content_height = self.wrap_content(
-            width - float(self.frame.width),
-            height - float(self.frame.height)
-        )
+    def apply_layout(self, layout):
+        self.layout = layout
+        self.width = layout.width
+        self.height = layout.height
+        self.content_width = layout.content_width
+        self.content_height = layout.content_height
+        self.content_avail = layout.content_avail
+
+    def restore(self, layout):
+        self.apply_layout(layout)
+        self.wrap_content(*layout.content_avail)
+
+    def refresh_content(self, avail_width, avail_height):
+        pass
+
+    def measure(self, avail_width, avail_height):
+        width = FlexMeasurement.min(self.max_width, self.flex_width, base=avail_width) or float(avail_width)
+        height = FlexMeasurement.min(self.max_height, self.flex_height, base=avail_height) or float(avail_height)
+
+        content_avail = (width - self.frame.width.resolve(width), height - self.frame.height.resolve(height))
+        content_width, content_height = self.wrap_content(*content_avail)
 
         if not self.flex_width:
-            self.frame.width.base = (content_width + self.frame.width.static) / (1 - self.frame.width.relative)
-            width = content_width + float(self.frame.width)
+            width_base = (content_width + self.frame.width.static) / (1 - self.frame.width.relative)
+            width = content_width + self.frame.width.resolve(width_base)
 
         if not self.flex_height:
-            self.frame.height.base = (content_height + self.frame.height.static) / (1 - self.frame.height.relative)
-            height = content_height + float(self.frame.height)
+            height_base = (content_height + self.frame.height.static) / (1 - self.frame.height.relative)
+            height = content_height + self.frame.height.resolve(height_base)
 
         if self.min_width:
-            width = max(width, float(self.min_width))
+            width = max(width, self.min_width.resolve(avail_width))
         if self.max_width:
-            width = min(width, float(self.max_width))
+            width = min(width, self.max_width.resolve(avail_width))
 
         if self.min_height:
-            height = max(height, float(self.min_height))
+            height = max(height, self.min_height.resolve(avail_height))
         if self.max_height:
-            height = min(height, float(self.max_height))
+            height = min(height, self.max_height.resolve(avail_height))
+
+        return WrapLayout(
+            width,
+            height,
+            content_width,
+            content_height,
+            content_avail,
+            self.margin.resolve(width, height),
+            self.border.resolve(width, height),
+            self.frame.resolve(width, height)
+        )
 
-        self.frame.width.base = width
-        self.frame.height.base = height
+    def wrap_content(self, avail_width, avail_height):
+        return 0, 0
 
-        self.width = width
-        self.height = height
-        self.content_width = content_width
-        self.content_height = content_height
+    def depends_on_height(self):
+        """
+        Whether the size of the item (and of everything it contains) can change with the available height. Items that
+        don't can be moved to another page without being wrapped again.
+        """
+        heights = tuple(m for m in (self.min_height, self.flex_height, self.max_height) if m)
+        if any(m.relative for m in heights) or self.frame.height.relative:
+            return True
 
-        return width, height
+        return not FlexMeasurement.min(self.max_height, self.flex_height, base=0) and self.content_depends_on_height()
 
-    def wrap_content(self, avail_width, avail_height):
-        return 0, 0
+    def content_depends_on_height(self):
+        # Content measured by a wrap_content of its own may fill the available height.
+        return type(self).wrap_content is not FlexItem.wrap_content
 
     def draw_background(self, background_width, background_height):
-        top = float(self.border.top)
-        right = float(self.border.right)
-        bottom = float(self.border.bottom)
-        left = float(self.border.left)
-
         if self.background_color:
             self.canv.setFillColor(self.background_color)
 
             self.canv.rect(
-                bottom / 2,
-                left / 2,
-                background_width - right / 2 - left / 2,
-                background_height - top / 2 - bottom / 2,
+                *background_rect(self.layout.border, background_width, background_height, self.hidden_border),
                 stroke=False,
                 fill=True
             )
 
     def draw_border(self, background_width, background_height):
-        top = float(self.border.top)
-        right = float(self.border.right)
-        bottom = float(self.border.bottom)
-        left = float(self.border.left)
-
-        self.canv.setStrokeColor(self.border_color or HexColor(0x000000))
-
-        if top:
-            self.canv.setLineWidth(top)
-            self.canv.line(0, background_height - top / 2, background_width, background_height - top / 2)
-        if right:
-            self.canv.setLineWidth(right)
-            self.canv.line(background_width - right / 2, background_height, background_width - right / 2, 0)
-        if bottom:
-            self.canv.setLineWidth(bottom)
-            self.canv.line(background_width, bottom / 2, 0, bottom / 2)
-        if left:
-            self.canv.setLineWidth(left)
-            self.canv.line(left / 2, 0, left / 2, background_height)
+        border = self.layout.border
+        if self.hidden_border:
+            border = tuple(0 if hidden else side for side, hidden in zip(border, self.hidden_border))
+
+        color = self.border_color or black
+        self.canv.setStrokeColor(color)
+
+        paths = border_paths(border, background_width, background_height, getattr(color, "alpha", 1) == 1)
+        if any(len(points) > 2 for _, points, _ in paths):
+            self.canv.setLineJoin(0)
+
+        for line_width, points, closed in paths:
+            self.canv.setLineWidth(line_width)
+            if len(points) == 2:
+                self.canv.line(*points[0], *points[1])
+            else:
+                self.canv.drawPath(border_path(self.canv.beginPath(), points, closed), stroke=1, fill=0)
 
     def draw(self):
+        # Items drawn within this one share the wrapper, and with it what is known about the graphics state.
+        self.canv = state_canvas(self.canv)
+        if not (self.form and draw_form(self)):
+            self.draw_item()
+
+    def draw_item(self):
+        margin = self.layout.margin
+        frame = self.layout.frame
+
         self.canv.saveState()
         self.canv.translate(
-            float(self.margin.left),
-            float(self.margin.bottom)
+            margin.left,
+            margin.bottom
         )
         self.draw_background(
-            self.width - float(self.margin.width),
-            self.height - float(self.margin.height)
+            self.width - margin.width,
+            self.height - margin.height
         )
         self.canv.restoreState()
 
         self.canv.saveState()
         self.canv.translate(
-            float(self.frame.left),
-            float(self.frame.bottom)
+            frame.left,
+            frame.bottom
         )
         self.draw_content(
-            self.width - float(self.frame.width),
-            self.height - float(self.frame.height),
+            self.width - frame.width,
+            self.height - frame.height,
             self.content_width,
             self.content_height
         )
@@ -171,18 +267,115 @@ class FlexItem(Flowable):
 
         self.canv.saveState()
         self.canv.translate(
-            float(self.margin.left),
-            float(self.margin.bottom)
+            margin.left,
+            margin.bottom
         )
         self.draw_border(
-            self.width - float(self.margin.width),
-            self.height - float(self.margin.height)
+            self.width - margin.width,
+            self.height - margin.height
         )
         self.canv.restoreState()
 
     def draw_content(self, avail_width, avail_height, requested_width, requested_height):
         pass
 
+    def form_key(self):
+        """
+        Everything the item draws depends on, once it is wrapped: items with equal keys draw exactly the same. None if
+        that can't be told, for subclasses that draw or wrap their content themselves without a key of their own.
+        """
+        if not keyed_drawing(type(self)):
+            return None
+
+        layout = self.layout
+        return (
+            type(self), float(self.width), float(self.height), layout.margin, layout.border, layout.frame,
+            self.background_color, self.border_color, self.hidden_border, float(self.content_width),
+            float(self.content_height)
+        )
+
+
+def background_rect(border, width, height, hidden=None):
+    """
+    The rectangle (x, y, width, height) the background of an item is filled in, within width x height: up to the
+    center lines of its border. Under the hidden sides of a collapsed border it reaches the edge, where the line drawn
+    by the neighbouring item begins.
+    """
+    top, right, bottom, left = border
+    x, y = bottom / 2, left / 2
+    if not hidden:
+        return x, y, width - right / 2 - left / 2, height - top / 2 - bottom / 2
+
+    hide_top, hide_right, hide_bottom, hide_left = hidden
+    x2 = width if hide_right else x + width - right / 2 - left / 2
+    y2 = height if hide_top else y + height - top / 2 - bottom / 2
+    if hide_left:
+        x = 0
+    if hide_bottom:
+        y = 0
+    return x, y, x2 - x, y2 - y
+
+
+def border_paths(border, width, height, joined=True):
+    """
+    The lines of a border (top, right, bottom, left) drawn within width x height, as (line width, points, closed),
+    clockwise from the top. Each side spans the full width or height. Sides of the same width next to each other are
+    joined into one path, mitred at the corners, which covers the same area, and four of them into a closed rectangle.
+    Unless `joined` is false: where the sides overlap, a translucent path is blended once instead of twice.
+    """
+    sides = tuple(border)
+    top, right, bottom, left = sides
+    ends = border_sides(border, width, height)
+    # The corner after each side.
+    corners = (
+        (width - right / 2, height - top / 2),
+        (width - right / 2, bottom / 2),
+        (left / 2, bottom / 2),
+        (left / 2, height - top / 2)
+    )
+
+    if joined and top and top == right == bottom == left:
+        return [(top, [corners[3], corners[0], corners[1], corners[2]], True)]
+
+    paths = []
+    for start, side in enumerate(sides):
+        if not side or (joined and sides[start - 1] == side):
+            # Part of the path starting at an earlier side.
+            continue
+
+        points = [ends[start][0]]
+        end = start
+        while joined and sides[(end + 1) % 4] == side:
+            points.append(corners[end])
+            end = (end + 1) % 4
+        points.append(ends[end][1])
+        paths.append((side, points, False))
+
+    return paths
+
+
+def border_sides(border, width, height):
+    """The start and end of the center line of each side of a border, spanning the full width or height."""
+    top, right, bottom, left = border
+    return (
+        ((0, height - top / 2), (width, height - top / 2)),
+        ((width - right / 2, height), (width - right / 2, 0)),
+        ((width, bottom / 2), (0, bottom / 2)),
+        ((left / 2, 0), (left / 2, height))
+    )
+
+
+def border_path(path, points, closed):
+    if closed:
+        (left, top), (right, _), _, (_, bottom) = points
+        path.rect(left, bottom, right - left, top - bottom)
+        return path
+
+    path.moveTo(*points[0])
+    for point in points[1:]:
+        path.lineTo(*point)
+    return path
+
 
 def widths(items):
     return tuple(float(getattr(item, "width", 0)) for item in items)
@@ -192,23 +385,24 @@ def heights(items):
     return tuple(float(getattr(item, "height", 0)) for item in items)
 
 
-class FlexRow(list):
-    width = None
-    height = None
-
-
 class FlexBox(FlexItem):
-    flex_direction = FortnumDescriptor("flex_direction", FlexDirection, default=FlexDirection.Row)
-    justify_content = FortnumDescriptor("justify_content", JustifyContent, default=JustifyContent.FlexStart)
-    align_items = FortnumDescriptor("align_items", AlignItems, default=AlignItems.FlexStart)
-    align_content = FortnumDescriptor("align_content", AlignContent, default=AlignContent.Stretch)
-    flex_wrap = FortnumDescriptor("flex_wrap", FlexWrap, default=FlexWrap.NoWrap)
+    flex_direction = OptionDescriptor("flex_direction", FlexDirection, default=FlexDirection.Row)
+    justify_content = OptionDescriptor("justify_content", JustifyContent, default=JustifyContent.FlexStart)
+    align_items = OptionDescriptor("align_items", AlignItems, default=AlignItems.FlexStart)
+    align_content = OptionDescriptor("align_content", AlignContent, default=AlignContent.Stretch)
+    flex_wrap = OptionDescriptor("flex_wrap", FlexWrap, default=FlexWrap.NoWrap)
+
+    transient_state = FlexItem.transient_state + ("rows", "pages", "page_range", "premeasured")
 
     def __init__(self, *flex_items, flex_direction=None, justify_content=None, align_content=None, align_items=None,
-                 flex_wrap=None, keep_together=None, **kwargs):
+                 flex_wrap=None, keep_together=None, collapse_borders=None, stream=None, renderer=None, **kwargs):
 
         self.items = flex_items
+        self.stream = iter(stream) if stream is not None else None
         self.rows = None
+        self.pages = None
+        self.page_range = None
+        self.premeasured = None
 
         self.flex_direction = flex_direction
         self.justify_content = justify_content
@@ -216,6 +410,14 @@ class FlexBox(FlexItem):
         self.align_content = align_content
         self.flex_wrap = flex_wrap
         self.keep_together = keep_together if keep_together is not None else False
+        # Sides of borders shared with an item drawn before are drawn once, by that item, and the backgrounds reach up
+        # to them. See collapsed_borders. Only the BatchRenderer does, for a box it renders or one nested in it, where
+        # the remaining lines are merged. Drawn by FlexItem.draw, items missing a side would draw open paths instead
+        # of rectangles, larger and slower, so the option is ignored there: every item draws its full border, and the
+        # lines between neighbours are doubled as without it.
+        self.collapse_borders = collapse_borders if collapse_borders is not None else False
+        # Draws the box in place of FlexItem.draw, such as flexbox.render.BatchRenderer. Called with the canvas.
+        self.renderer = renderer
 
         super().__init__(**kwargs)
 
@@ -227,50 +429,163 @@ class FlexBox(FlexItem):
             "align_content": align_content,
             "align_items": align_items,
             "flex_wrap": flex_wrap,
-            "keep_together": keep_together
+            "keep_together": keep_together,
+            "collapse_borders": collapse_borders,
+            "renderer": renderer
         })
 
+    def __getstate__(self):
+        if self.stream is not None:
+            raise TypeError("cannot pickle a FlexBox with a stream of items")
+
+        state = super().__getstate__()
+        # The items of a split part are a view of the whole box, only its own are kept.
+        state["_items"] = tuple(self.items)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.rows = self.pages = self.page_range = self.premeasured = None
+
+    def clone_item(self, static):
+        static = static or self.static
+        box = super().clone_item(static)
+        # Set without invalidating the measurements a static clone keeps.
+        box._items = tuple(
+            item.clone_item(static) if isinstance(item, FlexItem) else copy(item)
+            for item in self.items
+        )
+        return box
+
+    @property
+    def items(self):
+        return self._items
+
+    @items.setter
+    def items(self, items):
+        self._items = items
+        invalidate_wrap(self)
+
     def wrap_content(self, avail_width, avail_height):
+        if self.stream is not None:
+            self.pull(avail_width, avail_height)
+
         if not self.items:
             return 0, 0
 
+        if self.reuse_premeasured(avail_width):
+            return self.pages.size(*self.page_range)
+
         for item in self.items:
             item.wrap(avail_width, avail_height)
 
-        if self.flex_wrap == FlexWrap.Wrap:
-            if self.flex_direction == FlexDirection.Row:
-                available, lengths = avail_width, widths(self.items)
-            else:
-                available, lengths = avail_height, heights(self.items)
-
-            self.rows = []
-            row = FlexRow()
-            row_length = 0
-            for item, length in zip(self.items, lengths):
-                row_length += length
-                if row_length > available and row:
-                    self.rows.append(row)
-                    row = FlexRow()
-                    row_length = length
-                row.append(item)
-            self.rows.append(row)
-        else:
-            self.rows = [FlexRow(self.items)]
+        self.rows = self.measure_rows(self.items, avail_width, avail_height)
+        self.pages = None
+        self.page_range = None
 
         if self.flex_direction == FlexDirection.Row:
-            for row in self.rows:
-                row.width, row.height = sum(widths(row)), max(heights(row))
+            return max(widths(self.rows)), sum(heights(self.rows))
+        else:
+            return sum(widths(self.rows)), max(heights(self.rows))
+
+    def measure_rows(self, items, avail_width, avail_height):
+        item_widths, item_heights = widths(items), heights(items)
+        wrap = self.flex_wrap == FlexWrap.Wrap
 
-            content_width, content_height = max(widths(self.rows)), sum(heights(self.rows))
+        if self.flex_direction == FlexDirection.Row:
+            return [
+                FlexRow(items, start, stop, width, height)
+                for start, stop, width, height in measure_rows(item_widths, item_heights, avail_width, wrap)
+            ]
         else:
-            for row in self.rows:
-                row.width, row.height = max(widths(row)), sum(heights(row))
+            return [
+                FlexRow(items, start, stop, width, height)
+                for start, stop, height, width in measure_rows(item_heights, item_widths, avail_height, wrap)
+            ]
+
+    def pull(self, avail_width, avail_height):
+        # Items from the stream are only materialized until the complete rows overflow the available height. The rest
+        # is carried over to the part of the box that split places on the next page.
+        items = list(self.items)
+        stream = self.stream
+
+        if self.keep_together or (self.flex_direction == FlexDirection.Row) != (self.flex_wrap == FlexWrap.Wrap):
+            # Only wrapping rows and a single column can be split, anything else needs all of its items.
+            items.extend(stream)
+            stream = None
+
+        while stream is not None:
+            if self.flex_direction == FlexDirection.Row:
+                rows = measure_rows(widths(items), heights(items), avail_width, True) if items else []
+                height = sum(row[3] for row in rows[:-1])
+            else:
+                height = sum(heights(items))
 
-            content_width, content_height = sum(widths(self.rows)), max(heights(self.rows))
+            if height > avail_height:
+                break
 
-        return content_width, content_height
+            # Pull about as many items as are estimated to fill the rest of the page.
+            estimate = int((avail_height - height) * len(items) / height) + 1 if height > 0 else 16
+            chunk = list(islice(stream, estimate))
+            if not chunk:
+                stream = None
+            elif self.wrap_cache.entries:
+                # Layouts cached for fewer items are no longer valid.
+                self.wrap_cache.invalidate()
+
+            for item in chunk:
+                item.wrap(avail_width, avail_height)
+            items.extend(chunk)
+
+        if stream is None and len(items) != len(self.items) and self.wrap_cache.entries:
+            self.wrap_cache.invalidate()
+
+        self._items = items
+        self.stream = stream
+
+    def reuse_premeasured(self, avail_width):
+        # A part created by split shares the page index of the box it was split from. As long as nothing has been
+        # modified since and the width is the same, its rows are still valid, whatever the height on the new page.
+        if self.premeasured is None:
+            return False
+
+        measured_width, generation = self.premeasured
+        if measured_width != avail_width or generation != WrapCache.generation:
+            self.premeasured = None
+            return False
+
+        self.rows = self.pages.flex_rows(*self.page_range)
+        return True
+
+    def refresh_content(self, avail_width, avail_height):
+        if self.premeasured is not None:
+            return
+
+        for item in self.items:
+            item.wrap(avail_width, avail_height)
+
+    def content_depends_on_height(self):
+        if self.flex_direction == FlexDirection.Column and self.flex_wrap == FlexWrap.Wrap:
+            return True
+
+        # Flowables other than FlexItems can't tell, they are wrapped again on every page.
+        return any(not isinstance(item, FlexItem) or item.depends_on_height() for item in self.items)
+
+    @property
+    def arrangement(self):
+        if self.layout.arrangement is None:
+            self.layout.arrangement = self.arrange(
+                self.width - self.layout.frame.width,
+                self.height - self.layout.frame.height
+            )
+        return self.layout.arrangement
+
+    def arrange(self, avail_width, avail_height):
+        if not self.items:
+            return FlexArrangement()
+
+        positions = []
 
-    def draw_content(self, avail_width, avail_height, requested_width, requested_height):
         if self.flex_direction == FlexDirection.Row:
             row_heights = heights(self.rows)
             if self.align_content == AlignContent.Stretch:
@@ -280,55 +595,124 @@ class FlexBox(FlexItem):
                 y = avail_height - y
                 for item, x in zip(row, self.justify_content.points(widths(row), avail_width)):
                     align_item = getattr(item, "align_self", None) or self.align_items
-
-                    item.drawOn(
-                        self.canv,
+                    positions.append((
+                        item,
                         x,
                         y - float(item.height) - align_item.point(float(item.height), row_height)
-                    )
+                    ))
+
+            return FlexArrangement(row_heights, positions)
         else:
             col_widths = widths(self.rows)
             if self.align_content == AlignContent.Stretch:
                 col_widths = tuple(AlignContent.Stretch.stretch(col_widths, avail_width))
+
             for col, x, col_width in zip(self.rows, self.align_content.points(col_widths, avail_width), col_widths):
                 for item, y in zip(col, self.justify_content.points(heights(col), avail_height)):
                     align_item = getattr(item, "align_self", None) or self.align_items
-                    item.drawOn(self.canv, x + align_item.point(float(item.width), col_width),
-                                avail_height - float(item.height) - y, )
+                    positions.append((
+                        item,
+                        x + align_item.point(float(item.width), col_width),
+                        avail_height - float(item.height) - y
+                    ))
+
+            return FlexArrangement(col_widths, positions)
+
+    def draw_item(self):
+        if self.renderer is None:
+            super().draw_item()
+        else:
+            self.renderer(self.canv).draw(self)
+
+    def form_key(self):
+        key = super().form_key()
+        if key is None:
+            return None
+
+        arrangement = []
+        for item, x, y in self.arrangement:
+            item_key = item.form_key() if isinstance(item, FlexItem) else None
+            if item_key is None:
+                return None
+            arrangement.append((item_key, x, y))
+        return key + (self.collapse_borders, self.renderer, tuple(arrangement))
+
+    def draw_content(self, avail_width, avail_height, requested_width, requested_height):
+        for item, x, y in self.arrangement:
+            item.drawOn(self.canv, x, y)
+
+    def collapsed_borders(self):
+        """
+        For each item of the arrangement, the sides of its border (top, right, bottom, left) that lie on a side of the
+        same width and color of an item drawn before it, such as the edges adjacent cells of a grid share. None for
+        items with nothing to leave out.
+        """
+        drawn = {}
+        collapsed = []
+        for item, x, y in self.arrangement:
+            if not isinstance(item, FlexItem) or not any(item.layout.border):
+                collapsed.append(None)
+                continue
+
+            margin = item.layout.margin
+            left, bottom = x + margin.left, y + margin.bottom
+            right, top = x + item.width - margin.right, y + item.height - margin.top
+            edges = (
+                ("-", top, left, right), ("|", right, bottom, top), ("-", bottom, left, right), ("|", left, bottom, top)
+            )
+            color = item.border_color or black
+
+            hidden = []
+            for (direction, position, start, end), side in zip(edges, item.layout.border):
+                key = (direction, round(position, 6), round(start, 6), round(end, 6))
+                if side and drawn.get(key) == (side, color):
+                    hidden.append(True)
+                else:
+                    hidden.append(False)
+                    if side:
+                        drawn[key] = (side, color)
+
+            collapsed.append(tuple(hidden) if any(hidden) else None)
+        return collapsed
 
     def split(self, avail_width, avail_height):
         if self.keep_together:
             return []
 
-        first = []
-        second = []
-        height = 0
-
         if self.flex_direction == FlexDirection.Row:
             if len(self.rows) < 2:
                 return []
+        elif len(self.rows) > 1:
+            return []
 
-            for row in self.rows:
-                height += row.height
-
-                l = first if height < avail_height else second
-                for item in row:
-                    l.append(item)
-
-        else:
-            if len(self.rows) > 1:
-                return []
+        if self.pages is None:
+            if self.flex_direction == FlexDirection.Row:
+                self.pages = FlexPages(self.rows, widths(self.rows), heights(self.rows))
+            else:
+                self.pages = FlexPages(self.items, widths(self.items), heights(self.items), rows=False)
+            self.page_range = (0, len(self.pages))
 
-            for item in self.items:
-                height += item.height
-                (first if height < avail_height else second).append(item)
+        start, stop = self.page_range
+        index = self.pages.fit(start, stop, avail_height)
 
-        if not first and second:
+        if index == start and self.items:
             return []
 
-        return [
-            self.__class__(*first, **self.kwargs),
-            self.__class__(*second, **self.kwargs)
-        ]
+        premeasured = self.premeasured is not None or not self.content_depends_on_height()
+        first, second = self.split_part(start, index, premeasured), self.split_part(index, stop, premeasured)
+
+        if self.stream is not None:
+            second.items = list(second.items)
+            second.stream, self.stream = self.stream, None
+            second.pages = second.page_range = second.premeasured = None
 
+        return [first, second]
 
+    def split_part(self, start, stop, premeasured):
+        part = self.__class__(**self.kwargs)
+        part.items = self.pages.items(start, stop)
+        if premeasured and start != stop:
+            part.pages = self.pages
+            part.page_range = (start, stop)
+            part.premeasured = (self.content_avail[0], WrapCache.generation)
+        return part
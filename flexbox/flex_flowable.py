@@ -1,17 +1,25 @@
-from fortnum import FortnumDescriptor
-from reportlab.platypus import Paragraph, Image
+import re
+from copy import copy
 
-from flexbox.options import AlignItems
+from reportlab.platypus import Paragraph
+
+from flexbox.cache import invalidate_wrap
+from flexbox.display import draw_flowable
+from flexbox.options import AlignItems, OptionDescriptor
 from flexbox.flex import FlexItem
+from flexbox.images import image_resource, SharedImage
+from flexbox.paragraphs import style_fingerprint, wrap_paragraph
+
 
-from PIL import Image as PILImage
+# Markup drawing links, anchors and callbacks, which belong to the page the paragraph is drawn on.
+_page_markup = re.compile(r"<\s*(a|link|ondraw|index)\b", re.IGNORECASE)
 
 
 class FlexFlowable(FlexItem):
-    flowable = None
+    _flowable = None
 
-    vertical_align = FortnumDescriptor("vertical_align", AlignItems, default=AlignItems.FlexCenter)
-    horizontal_align = FortnumDescriptor("horizontal_align", AlignItems, default=AlignItems.FlexCenter)
+    vertical_align = OptionDescriptor("vertical_align", AlignItems, default=AlignItems.FlexCenter)
+    horizontal_align = OptionDescriptor("horizontal_align", AlignItems, default=AlignItems.FlexCenter)
 
     def __init__(self, flowable, vertical_align=None, horizontal_align=None, **kwargs):
         super().__init__(**kwargs)
@@ -20,35 +28,158 @@ class FlexFlowable(FlexItem):
         self.vertical_align = vertical_align or self.vertical_align
         self.horizontal_align = horizontal_align or self.horizontal_align
 
+    def clone_item(self, static):
+        item = super().clone_item(static)
+        if self.flowable is not None:
+            # Flowables hold the size they were last wrapped to, every copy needs its own.
+            item._flowable = copy(self.flowable)
+        return item
+
+    @property
+    def flowable(self):
+        return self._flowable
+
+    @flowable.setter
+    def flowable(self, flowable):
+        self._flowable = flowable
+        invalidate_wrap(self)
+
     def wrap_content(self, avail_width, avail_height):
         return self.flowable.wrap(avail_width, avail_height)
 
+    def content_depends_on_height(self):
+        return True
+
     def draw_content(self, avail_width, avail_height, requested_width, requested_height):
-        self.flowable.drawOn(
+        draw_flowable(
             self.canv,
+            self.flowable,
             self.vertical_align.point(requested_width, avail_width),
             self.horizontal_align.point(requested_height, avail_height)
         )
 
+    def form_key(self):
+        key = super().form_key()
+        flowable_key = self.flowable_key()
+        if key is None or flowable_key is None:
+            return None
+        return key + (self.vertical_align, self.horizontal_align, flowable_key)
+
+    def flowable_key(self):
+        """What the wrapped flowable draws, see form_key. None for flowables other than paragraphs and images."""
+        return None
+
 
 class FlexParagraph(FlexFlowable):
+    # The paragraph and its line key are rebuilt from the text and style when unpickled, which is smaller than them.
+    transient_state = FlexFlowable.transient_state + ("_flowable", "line_key")
+
     def __init__(self, text, style, **kwargs):
         super().__init__(
             Paragraph(text, style),
             **kwargs
         )
 
+        self._text = text
+        self.style = style
+        self.line_key = self.paragraph_key()
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, text):
+        self._text = text
+        self.flowable = None
+
+    def paragraph_key(self):
+        # Paragraphs with the same text and style share their line breaking, see flexbox.paragraphs.
+        return (self.text, style_fingerprint(self.style)) if isinstance(self.text, str) else None
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        # Parsed on the first wrap, in the process that renders it.
+        self._flowable = None
+
+    def clone_item(self, static):
+        item = super().clone_item(static)
+        if item.flowable is not None:
+            item.line_key = self.line_key
+        return item
+
+    def flowable_key(self):
+        # The paragraph is parsed from the text and style it had when it was created.
+        if self.line_key is None or self.line_key != self.paragraph_key() or _page_markup.search(self.text):
+            return None
+        return self.line_key + (self.flowable.width, self.flowable.height)
+
+    def content_depends_on_height(self):
+        # Lines are broken by the width alone.
+        return False
+
+    def wrap_content(self, avail_width, avail_height):
+        if self.flowable is None:
+            self._flowable = Paragraph(self.text, self.style)
+            self.line_key = self.paragraph_key()
+        return wrap_paragraph(self.flowable, self.line_key, avail_width, avail_height)
+
 
 class FlexImage(FlexFlowable):
-    def __init__(self, image, **kwargs):
-        self.image = image
+    transient_state = FlexFlowable.transient_state + ("_flowable", "_resource")
 
-        with PILImage.open(self.image) as img:
-            img_width, img_height = img.size
-            self.aspect = img_height / img_width
+    def __init__(self, image, max_dpi=None, loader=None, **kwargs):
+        self._image = image
+        # Fetches the image, when it isn't a local path, bytes or file-like object. See flexbox.loaders.
+        self.loader = loader
+        # When set, images are resampled to at most this resolution at the size they are drawn.
+        self.max_dpi = max_dpi
+        self._resource = None
 
         super().__init__(None, **kwargs)
 
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._resource = None
+
+    def clone_item(self, static):
+        item = super().clone_item(static)
+        item._resource = self._resource
+        return item
+
+    @property
+    def image(self):
+        return self._image
+
+    @image.setter
+    def image(self, image):
+        self._image = image
+        self._resource = None
+        self.flowable = None
+
+    @property
+    def resource(self):
+        # Resolved on first use, so the images of a tree can be prefetched concurrently before it is wrapped.
+        if self._resource is None:
+            self._resource = image_resource(self.image, self.loader)
+        return self._resource
+
+    @property
+    def aspect(self):
+        img_width, img_height = self.resource.size
+        return img_height / img_width
+
+    def flowable_key(self):
+        resource = self.resource
+        return (
+            resource if resource.key is None else resource.key, self.flowable.drawWidth, self.flowable.drawHeight,
+            self.max_dpi
+        )
+
+    def content_depends_on_height(self):
+        # Images are scaled to fit the available height.
+        return True
+
     def wrap_content(self, avail_width, avail_height):
         height = avail_height
         width = height / self.aspect
@@ -57,6 +188,10 @@ class FlexImage(FlexFlowable):
             height = height * avail_width / width
             width = avail_width
 
-        self.flowable = Image(self.image, width, height)
+        if self.flowable is None:
+            self._flowable = SharedImage(self.resource, width, height, self.max_dpi)
+        else:
+            self.flowable.drawWidth, self.flowable.drawHeight = width, height
+            self.flowable.max_dpi = self.max_dpi
 
         return width, height
@@ -0,0 +1,88 @@
+from weakref import WeakKeyDictionary
+
+from reportlab.pdfgen.canvas import ExtGState
+
+from flexbox.cache import CacheInfo
+from flexbox.state import StateCanvas
+
+
+# Forms are clipped to their bounding box, which reaches as far as the largest page PDF allows (200 inches) on every
+# side of the item.
+FORM_EXTENT = 14400
+
+# The methods an item draws itself with, and the methods returning the key of what it draws.
+DRAWING_METHODS = ("draw", "draw_item", "draw_content", "draw_background", "draw_border", "drawOn", "_drawOn",
+                   "wrap_content")
+KEY_METHODS = ("form_key", "flowable_key")
+
+# The name of every form drawn in a document, by key.
+_forms = WeakKeyDictionary()
+_keyed_classes = {}
+form_cache_info = CacheInfo()
+
+
+def draw_form(item):
+    """
+    Draw an item at the origin of its canvas as a form XObject, shared by every item with the same form key drawn in
+    the document. The form is recorded when the first of them is drawn. Returns False, for the item to be drawn as
+    usual, if it has no key or the graphics state it is drawn in differs from the one forms are recorded in in a way
+    that can't be undone.
+    """
+    canv = item.canv
+    if not isinstance(canv, StateCanvas) or not default_extgstate(canv):
+        return False
+
+    key = item.form_key()
+    if key is None:
+        return False
+
+    forms = _forms.setdefault(canv._doc, {})
+    name = forms.get(key)
+    if name is None:
+        form_cache_info.misses += 1
+        # Named before it is recorded, the items in it may be drawn as forms of their own.
+        name = forms[key] = "FlexForm%d" % len(forms)
+        canv.beginForm(name, -FORM_EXTENT, -FORM_EXTENT, FORM_EXTENT, FORM_EXTENT)
+        item.draw_item()
+        canv.endForm()
+    else:
+        form_cache_info.hits += 1
+
+    # A form is recorded in the initial graphics state, the operators the canvas left out as redundant there (see
+    # StateCanvas) have to be redundant where it is placed as well.
+    canv.setFillColor((0, 0, 0))
+    canv.setStrokeColor((0, 0, 0))
+    canv.setLineWidth(1)
+    canv.setLineJoin(0)
+    canv.setLineCap(0)
+    canv.doForm(name)
+    return True
+
+
+def default_extgstate(canv):
+    """Whether the transparency, overprint and blend mode of the canvas are the initial ones."""
+    return all(ExtGState.defaults[name] == value for name, value in canv._extgstate._d.items())
+
+
+def keyed_drawing(cls):
+    """
+    Whether the key methods of an item class account for the way it draws: none of its drawing methods are defined
+    by a subclass of the class defining its key.
+    """
+    keyed = _keyed_classes.get(cls)
+    if keyed is None:
+        for klass in cls.__mro__:
+            attributes = vars(klass)
+            if any(name in attributes for name in KEY_METHODS):
+                keyed = True
+                break
+            if any(name in attributes for name in DRAWING_METHODS):
+                keyed = False
+                break
+        _keyed_classes[cls] = keyed = bool(keyed)
+    return keyed
+
+
+def clear_forms():
+    _forms.clear()
+    form_cache_info.clear()
@@ -0,0 +1,311 @@
+import os
+import struct
+import threading
+from collections import OrderedDict
+from hashlib import sha1
+from io import BytesIO
+from math import ceil
+
+from PIL import Image as PILImage
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Flowable
+
+from flexbox.cache import CacheInfo
+
+
+IMAGE_SIZE_LIMIT = 4096
+_image_sizes = {}
+image_size_info = CacheInfo()
+
+# Resources are dropped, least recently used first, when there are more than IMAGE_RESOURCE_LIMIT of them or the data
+# they hold adds up to more than IMAGE_RESOURCE_BYTES. See ImageResource.nbytes.
+IMAGE_RESOURCE_LIMIT = 256
+IMAGE_RESOURCE_BYTES = 64 * 2 ** 20
+_image_resources = OrderedDict()
+_image_resources_lock = threading.Lock()
+
+RESAMPLED_LIMIT = 64
+_resampled = OrderedDict()
+resampled_info = CacheInfo()
+
+# JPEG start of frame markers, the ones holding the image dimensions. C4, C8 and CC are other markers in the same range.
+_jpeg_frame_markers = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# JPEG markers that stand alone, without a length.
+_jpeg_standalone_markers = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+
+def image_key(image):
+    """
+    The key under which information about an image is cached: the path, modification time and size of a file or the
+    length and digest of the bytes of an in-memory image, so that the cache doesn't keep the bytes alive. Other
+    file-like objects may change under us and are not cached (None).
+    """
+    if isinstance(image, (str, os.PathLike)):
+        path = os.fspath(image)
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+    if isinstance(image, bytes):
+        return len(image), sha1(image).digest()
+    return None
+
+
+def image_size(image):
+    """
+    The (width, height) in pixels of an image given as a path, bytes or file-like object. The dimensions of JPEG, PNG
+    and GIF images are read from their header without decoding them, other formats are opened with PIL. Results for
+    paths and bytes are cached for the whole process.
+    """
+    key = image_key(image)
+    if key is None:
+        return read_image_size(image)
+
+    size = _image_sizes.get(key)
+    if size is not None:
+        image_size_info.hits += 1
+        return size
+
+    image_size_info.misses += 1
+    size = read_image_size(image)
+
+    if len(_image_sizes) >= IMAGE_SIZE_LIMIT:
+        _image_sizes.clear()
+    _image_sizes[key] = size
+    return size
+
+
+def clear_image_sizes():
+    _image_sizes.clear()
+    image_size_info.clear()
+
+
+class ImageResource:
+    """
+    An image source shared by every FlexImage using it. Files are handed to the canvas by path, which embeds each once
+    per document. Other sources are decoded once by a shared ImageReader, whose data the canvas embeds once as well.
+    """
+    __slots__ = ("source", "key", "size", "_reader")
+
+    def __init__(self, source, key=None):
+        self.source = image_source(source)
+        self.key = key
+        self.size = image_size(source)
+        self._reader = None
+
+    def open(self):
+        if isinstance(self.source, bytes):
+            return PILImage.open(BytesIO(self.source))
+        if not isinstance(self.source, (str, os.PathLike)):
+            self.source.seek(0)
+        return PILImage.open(self.source)
+
+    @property
+    def reader(self):
+        if self._reader is None:
+            self._reader = ImageReader(BytesIO(self.source) if isinstance(self.source, bytes) else self.source)
+        return self._reader
+
+    @property
+    def nbytes(self):
+        """Roughly the memory the resource holds on to: the data of an in-memory image and what its reader decoded."""
+        size = len(self.source) if isinstance(self.source, bytes) else 0
+        if self._reader is not None and self._reader._data is not None:
+            size += len(self._reader._data)
+        return size
+
+    @property
+    def drawable(self):
+        if isinstance(self.source, (str, os.PathLike)):
+            return os.fspath(self.source)
+        return self.reader
+
+
+def image_resource(image, loader=None):
+    """
+    The shared resource of an image. Without a loader the image is a path, bytes or file-like object, otherwise the
+    loader fetches its data (see flexbox.loaders) and decides how it is cached.
+    """
+    if loader is None:
+        image = image_source(image)
+        key = image_key(image)
+    else:
+        key = loader.key(image)
+        key = (loader, key) if key is not None else None
+
+    if key is None:
+        return ImageResource(loader.load(image) if loader else image)
+
+    with _image_resources_lock:
+        resource = _image_resources.get(key)
+        if resource is not None:
+            _image_resources.move_to_end(key)
+            return resource
+
+    # Loaded outside of the lock, images are fetched concurrently. See flexbox.loaders.prefetch_images.
+    resource = ImageResource(loader.load(image) if loader else image, key)
+    with _image_resources_lock:
+        resource = _image_resources.setdefault(key, resource)
+        _image_resources.move_to_end(key)
+        evict_image_resources()
+    return resource
+
+
+def evict_image_resources():
+    # Readers decode their image after the resource is added, so the sizes are summed again every time.
+    total = sum(resource.nbytes for resource in _image_resources.values())
+    while len(_image_resources) > 1 and (len(_image_resources) > IMAGE_RESOURCE_LIMIT or total > IMAGE_RESOURCE_BYTES):
+        _, resource = _image_resources.popitem(last=False)
+        total -= resource.nbytes
+
+
+def image_source(image):
+    """The image as ImageResource keeps it: bytes-like objects are copied to bytes, to be keyed and read as such."""
+    if isinstance(image, (bytearray, memoryview)):
+        return bytes(image)
+    return image
+
+
+def clear_image_resources():
+    with _image_resources_lock:
+        _image_resources.clear()
+    _resampled.clear()
+    resampled_info.clear()
+
+
+def pixel_size(width, height, dpi):
+    """The size in pixels of an image drawn width x height points large at the given resolution."""
+    return max(1, ceil(width * dpi / 72)), max(1, ceil(height * dpi / 72))
+
+
+def resampled_image(resource, size):
+    """
+    The image of a resource resampled to size pixels, for the canvas to draw. Images are never enlarged. The most
+    recently used variants are cached by (source, size), so an image drawn at the same size again isn't resampled.
+    """
+    width, height = size
+    if width >= resource.size[0] or height >= resource.size[1]:
+        return resource.drawable
+
+    key = (resource.key or resource, size)
+    reader = _resampled.get(key)
+    if reader is not None:
+        resampled_info.hits += 1
+        _resampled.move_to_end(key)
+        return reader
+
+    resampled_info.misses += 1
+    with resource.open() as img:
+        image_format = img.format
+        img.draft("RGB", size)
+        if img.mode not in ("1", "L", "RGB", "RGBA", "CMYK"):
+            img = img.convert("RGBA")
+        img = img.resize(size, PILImage.LANCZOS)
+
+    if image_format == "JPEG" and img.mode in ("L", "RGB", "CMYK"):
+        # Keep photos DCT encoded, the canvas embeds JPEG data as it is.
+        stream = BytesIO()
+        img.save(stream, "JPEG", quality=90)
+        stream.seek(0)
+        reader = ImageReader(stream)
+    else:
+        reader = ImageReader(img)
+
+    _resampled[key] = reader
+    if len(_resampled) > RESAMPLED_LIMIT:
+        _resampled.popitem(last=False)
+    return reader
+
+
+class SharedImage(Flowable):
+    """
+    Draws an ImageResource. Unlike reportlab's Image it doesn't open the source itself, so it can simply be resized
+    when the FlexImage holding it is wrapped again.
+    """
+    def __init__(self, resource, width, height, max_dpi=None):
+        super().__init__()
+        self.resource = resource
+        self.drawWidth = width
+        self.drawHeight = height
+        self.max_dpi = max_dpi
+
+    def wrap(self, avail_width, avail_height):
+        return self.drawWidth, self.drawHeight
+
+    def draw(self):
+        if self.max_dpi:
+            image = resampled_image(self.resource, pixel_size(self.drawWidth, self.drawHeight, self.max_dpi))
+        else:
+            image = self.resource.drawable
+
+        self.canv.drawImage(image, 0, 0, self.drawWidth, self.drawHeight, mask="auto")
+
+
+def read_image_size(image):
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = BytesIO(image)
+
+    if isinstance(image, (str, os.PathLike)):
+        with open(image, "rb") as stream:
+            size = probe_image_size(stream.read(512), _reader(stream, 0))
+    else:
+        position = image.tell()
+        try:
+            size = probe_image_size(image.read(512), _reader(image, position))
+        finally:
+            image.seek(position)
+
+    if size is None:
+        with PILImage.open(image) as img:
+            size = img.size
+    return tuple(size)
+
+
+def _reader(stream, start):
+    def read(offset, length):
+        stream.seek(start + offset)
+        return stream.read(length)
+    return read
+
+
+def probe_image_size(header, read):
+    """
+    Read the dimensions of a JPEG, PNG or GIF image from its header. `read(offset, length)` returns bytes beyond the
+    given header, JPEG headers can be arbitrarily long. Returns None for other or malformed images.
+    """
+    if header[:8] == b"\x89PNG\r\n\x1a\n" and header[12:16] == b"IHDR":
+        return struct.unpack(">II", header[16:24])
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", header[6:10])
+    if header[:2] == b"\xff\xd8":
+        return _probe_jpeg_size(header, read)
+    return None
+
+
+def _probe_jpeg_size(header, read):
+    offset = 2
+    while True:
+        segment = header[offset:offset + 9]
+        if len(segment) < 9:
+            segment = read(offset, 9)
+            if len(segment) < 2:
+                return None
+
+        if segment[0] != 0xFF:
+            return None
+        marker = segment[1]
+        if marker == 0xFF:
+            # Fill byte
+            offset += 1
+            continue
+        if marker in _jpeg_standalone_markers:
+            offset += 2
+            continue
+        if len(segment) < 4:
+            return None
+        if marker in _jpeg_frame_markers:
+            if len(segment) < 9:
+                return None
+            height, width = struct.unpack(">HH", segment[5:9])
+            return width, height
+
+        length, = struct.unpack(">H", segment[2:4])
+        offset += 2 + length
@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from queue import LifoQueue, Empty
+
+from flexbox.flex import FlexBox
+from flexbox.flex_flowable import FlexImage
+from flexbox.images import image_key, image_resource
+
+
+class ImageLoader:
+    """
+    Fetches the data of the images a FlexImage is given. `key` returns what the loaded image is cached under (or None
+    to not cache it) and `load` a path, bytes or file-like object for it. Both may be called from several threads.
+    """
+    def key(self, source):
+        raise NotImplementedError()
+
+    def load(self, source):
+        raise NotImplementedError()
+
+
+class FileLoader(ImageLoader):
+    """Loads local files, bytes and file-like objects. The same as giving FlexImage no loader."""
+    def key(self, source):
+        return image_key(source)
+
+    def load(self, source):
+        return source
+
+
+class ConnectionPool:
+    """At most `size` connections in use at the same time, idle ones are kept open to be reused."""
+    def __init__(self, connect, size=4):
+        self.connect = connect
+        self.size = size
+        self.idle = LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        with self.slots:
+            try:
+                connection = self.idle.get_nowait()
+            except Empty:
+                connection = self.connect()
+
+            try:
+                yield connection
+            finally:
+                self.idle.put(connection)
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except Empty:
+                break
+
+
+class LocalBlobStore:
+    """
+    A stand-in for a remote blob store, serving the files in a local directory. Connecting and every request take
+    `latency` seconds, like a round trip to a server would.
+    """
+    def __init__(self, root, latency=0):
+        self.root = root
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def connect(self):
+        with self.lock:
+            self.connections += 1
+        time.sleep(self.latency)
+        return BlobConnection(self)
+
+    def request(self):
+        with self.lock:
+            self.requests += 1
+        time.sleep(self.latency)
+
+
+class BlobConnection:
+    def __init__(self, store):
+        self.store = store
+        self.closed = False
+
+    def path(self, name):
+        path = os.path.normpath(os.path.join(self.store.root, name))
+        if os.path.commonpath((path, self.store.root)) != os.path.normpath(self.store.root):
+            raise KeyError(name)
+        return path
+
+    def stat(self, name):
+        self.store.request()
+        stat = os.stat(self.path(name))
+        return stat.st_size, stat.st_mtime_ns
+
+    def get(self, name):
+        self.store.request()
+        with open(self.path(name), "rb") as file:
+            return file.read()
+
+    def close(self):
+        self.closed = True
+
+
+class BlobStoreLoader(ImageLoader):
+    """Loads images by name from a blob store, over a pool of at most `connections` connections."""
+    def __init__(self, store, connections=4):
+        self.store = store
+        self.pool = ConnectionPool(store.connect, connections)
+
+    def __getstate__(self):
+        # Connections stay with the process that opened them.
+        return self.store, self.pool.size
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def key(self, source):
+        with self.pool.connection() as connection:
+            return (source,) + connection.stat(source)
+
+    def load(self, source):
+        with self.pool.connection() as connection:
+            return connection.get(source)
+
+    def close(self):
+        self.pool.close()
+
+
+def flex_images(flowable):
+    """Every FlexImage in a tree of FlexBoxes, FlexItems and flowables (items still in a stream are not included)."""
+    pending = [flowable]
+    while pending:
+        flowable = pending.pop()
+        if isinstance(flowable, FlexImage):
+            yield flowable
+        elif isinstance(flowable, FlexBox):
+            pending.extend(flowable.items)
+
+
+def prefetch_images(*flowables, workers=8):
+    """
+    Fetch and decode the images of the given flowables concurrently, on at most `workers` threads, before they are
+    wrapped. Blocks until every image is loaded, errors are raised when the image is used.
+    """
+    images = {}
+    for flowable in flowables:
+        for flex_image in flex_images(flowable):
+            if flex_image._resource is None:
+                images.setdefault((flex_image.loader, _identity(flex_image.image)), []).append(flex_image)
+
+    def fetch(group):
+        try:
+            resource = image_resource(group[0].image, group[0].loader)
+            if not isinstance(resource.source, (str, os.PathLike)):
+                # The canvas embeds files from their path itself, other images are decoded by their reader.
+                resource.reader.getRGBData()
+        except Exception:
+            return
+        for flex_image in group:
+            flex_image._resource = resource
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(fetch, images.values()):
+            pass
+
+
+def _identity(image):
+    try:
+        hash(image)
+        return image
+    except TypeError:
+        return id(image)
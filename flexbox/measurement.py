@@ -1,64 +1,29 @@
-from itertools import chain
-from weakref import WeakKeyDictionary
+from collections import namedtuple
 
+from flexbox.cache import invalidate_wrap
 
-class CompoundFlexMeasurement:
-    def __init__(self, positive=None, negative=None):
-        self.positive = list(m for m in positive or [])
-        self.negative = list(m for m in negative or [])
 
-    def __float__(self):
-        return sum(float(m) for m in self.positive) - sum(float(m) for m in self.negative)
-
-    @property
-    def static(self):
-        return sum(m.static for m in self.positive) - sum(m.static for m in self.negative)
-
-    @property
-    def relative(self):
-        return sum(m.relative for m in self.positive) - sum(m.relative for m in self.negative)
-
-    @property
-    def base(self):
-        raise NotImplementedError()
-
-    @base.setter
-    def base(self, value):
-        for m in chain(self.positive, self.negative):
-            m.base = value
-
-    def __add__(self, other):
-        if isinstance(other, CompoundFlexMeasurement):
-            return CompoundFlexMeasurement(chain(self.positive, other.positive), chain(self.negative, other.negative))
-        if not isinstance(other, FlexMeasurement):
-            other = FlexMeasurement.parse(other)
-        return CompoundFlexMeasurement(chain(self.positive, [other]), self.negative)
-
-    def __sub__(self, other):
-        if isinstance(other, CompoundFlexMeasurement):
-            return CompoundFlexMeasurement(chain(self.positive, other.negative), chain(self.negative, other.positive))
-        if isinstance(other, FlexMeasurement):
-            return CompoundFlexMeasurement(chain(self.positive), chain(self.negative, [other]))
-
-    def __bool__(self):
-        return any(chain(self.positive, self.negative))
+# Parsed literals, folded sums and frames are shared between every item using them. The tables are bounded so documents with
+# many computed, one-off values don't grow them forever.
+INTERN_LIMIT = 4096
+_interned_literals = {}
+_interned_values = {}
+_interned_frames = {}
+_interned_frame_literals = {}
 
 
 class FlexMeasurement:
+    __slots__ = ("_static", "_relative")
+
     def __init__(self, static=None, relative=None):
-        self._static = static
-        self._relative = relative
-        self._base = None
+        object.__setattr__(self, "_static", static)
+        object.__setattr__(self, "_relative", relative)
 
-    @property
-    def base(self):
-        if self._base is None:
-            raise Exception("Base not set.")
-        return self._base
+    def __setattr__(self, key, value):
+        raise AttributeError("FlexMeasurement is immutable.")
 
-    @base.setter
-    def base(self, value):
-        self._base = value
+    def __delattr__(self, item):
+        raise AttributeError("FlexMeasurement is immutable.")
 
     @property
     def static(self):
@@ -68,38 +33,36 @@ class FlexMeasurement:
     def relative(self):
         return self._relative or 0
 
+    def resolve(self, base):
+        return float(self.static + self.relative * base)
+
     def __float__(self):
-        return float(self.static + self.relative * self.base)
+        if self.relative:
+            raise Exception("Relative measurement '%s' has to be resolved against a base." % self)
+        return float(self.static)
 
     def __add__(self, other):
-        if isinstance(other, CompoundFlexMeasurement):
-            return CompoundFlexMeasurement(chain([self], other.positive), other.negative)
-        if not isinstance(other, FlexMeasurement):
-            other = FlexMeasurement.parse(other)
-        return CompoundFlexMeasurement([self, other], [])
+        return FlexMeasurement.sum([self, FlexMeasurement.parse(other)])
 
     def __sub__(self, other):
-        if isinstance(other, CompoundFlexMeasurement):
-            return CompoundFlexMeasurement(other.negative, chain(other.positive, [self]))
-        if isinstance(other, FlexMeasurement):
-            return CompoundFlexMeasurement([self], [other])
+        return FlexMeasurement.sum([self], [FlexMeasurement.parse(other)])
 
     def __bool__(self):
         return not (self._static is None and self._relative is None)
 
     def __eq__(self, other):
         if isinstance(other, FlexMeasurement):
-            return (
-                       self._static == other._static
-                   ) and (
-                       self._relative == other._relative
-                   ) and (
-                       self._base == other._base
-                   )
+            return self._static == other._static and self._relative == other._relative
         elif isinstance(other, float):
             return float(self) == other
         return False
 
+    def __hash__(self):
+        return hash((self._static, self._relative))
+
+    def __reduce__(self):
+        return FlexMeasurement.of, (self._static, self._relative)
+
     def __str__(self):
         args = []
 
@@ -116,145 +79,245 @@ class FlexMeasurement:
     def __repr__(self):
         return str(self)
 
+    @staticmethod
+    def of(static=None, relative=None):
+        key = (static, relative)
+        try:
+            return _interned_values[key]
+        except KeyError:
+            measurement = FlexMeasurement(static, relative)
+            if len(_interned_values) < INTERN_LIMIT:
+                _interned_values[key] = measurement
+            return measurement
+
+    @staticmethod
+    def sum(positive, negative=()):
+        # The terms are folded into a single static and relative part, so evaluating the result costs the same no
+        # matter how many measurements were added together.
+        static = 0
+        relative = 0
+        is_set = False
+
+        for m in positive:
+            static += m.static
+            relative += m.relative
+            is_set = is_set or bool(m)
+        for m in negative:
+            static -= m.static
+            relative -= m.relative
+            is_set = is_set or bool(m)
+
+        if is_set:
+            return FlexMeasurement.of(static, relative)
+        return FlexMeasurement.of(None, None)
+
     @staticmethod
     def parse(value):
-        if issubclass(type(value), (FlexMeasurement, CompoundFlexMeasurement)):
+        if isinstance(value, FlexMeasurement):
             return value
 
+        key = (type(value), value)
+        try:
+            return _interned_literals[key]
+        except (KeyError, TypeError):
+            pass
+
+        measurement = FlexMeasurement._parse(value)
+        if len(_interned_literals) < INTERN_LIMIT:
+            _interned_literals[key] = measurement
+        return measurement
+
+    @staticmethod
+    def _parse(value):
         if value is None:
-            return FlexMeasurement(None, None)
+            return FlexMeasurement.of(None, None)
 
         if isinstance(value, (int, float)):
-            return FlexMeasurement(value, 0)
+            return FlexMeasurement.of(value, 0)
 
         if isinstance(value, str):
             if "%" in value:
-                return FlexMeasurement(0, float(value.replace("%", "")) / 100)
+                return FlexMeasurement.of(0, float(value.replace("%", "")) / 100)
             else:
-                return FlexMeasurement(float(value), 0)
+                return FlexMeasurement.of(float(value), 0)
 
         raise Exception("Unable to parse measurement '%s'" % value)
 
     @staticmethod
-    def max(*measurements):
-        measurements = tuple(float(m) for m in measurements if m)
+    def max(*measurements, base=None):
+        measurements = tuple(m.resolve(base) for m in measurements if m)
         if measurements:
             return max(measurements)
         else:
             return None
 
     @staticmethod
-    def min(*measurements):
-        measurements = tuple(float(m) for m in measurements if m)
+    def min(*measurements, base=None):
+        measurements = tuple(m.resolve(base) for m in measurements if m)
         if measurements:
             return min(measurements)
         else:
             return None
 
 
+class CompoundFlexMeasurement(FlexMeasurement):
+    __slots__ = ()
+
+    def __init__(self, positive=None, negative=None):
+        measurement = FlexMeasurement.sum(positive or (), negative or ())
+        super().__init__(measurement._static, measurement._relative)
+
+
 class FlexMeasurementDescriptor:
     def __init__(self):
-        self.values = WeakKeyDictionary()
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = "_%s_value" % name
 
     def __get__(self, instance, owner):
-        try:
-            return self.values[instance]
-        except KeyError:
-            return None
+        if instance is None:
+            return self
+        return getattr(instance, self.name, None)
 
     def __set__(self, instance, value):
-        self.values[instance] = FlexMeasurement.parse(value)
+        setattr(instance, self.name, FlexMeasurement.parse(value))
+        invalidate_wrap(instance)
 
 
-class FlexFrame:
-    top = FlexMeasurementDescriptor()
-    right = FlexMeasurementDescriptor()
-    bottom = FlexMeasurementDescriptor()
-    left = FlexMeasurementDescriptor()
+class ResolvedFrame(namedtuple("ResolvedFrame", ("top", "right", "bottom", "left"))):
+    __slots__ = ()
+
+    @property
+    def width(self):
+        return self.right + self.left
+
+    @property
+    def height(self):
+        return self.top + self.bottom
 
-    _width_base = None
-    _height_base = None
+
+class FlexFrame:
+    __slots__ = ("top", "right", "bottom", "left", "width", "height")
 
     def __init__(self, *measurements):
         if len(measurements) == 1:
-            self.top = measurements[0]
-            self.right = measurements[0]
-            self.bottom = measurements[0]
-            self.left = measurements[0]
+            top = right = bottom = left = measurements[0]
         elif len(measurements) == 2:
-            self.top = measurements[0]
-            self.right = measurements[1]
-            self.bottom = measurements[0]
-            self.left = measurements[1]
+            top, right = measurements
+            bottom, left = top, right
         elif len(measurements) == 3:
-            self.top = measurements[0]
-            self.right = measurements[1]
-            self.bottom = measurements[2]
-            self.left = measurements[1]
+            top, right, bottom = measurements
+            left = right
         elif len(measurements) == 4:
-            self.top = measurements[0]
-            self.right = measurements[1]
-            self.bottom = measurements[2]
-            self.left = measurements[3]
+            top, right, bottom, left = measurements
         else:
-            self.top = None
-            self.right = None
-            self.bottom = None
-            self.left = None
-
-        self.width = self.right + self.left
-        self.height = self.top + self.bottom
-
-        # @property
-        # def width_base(self):
-        #     if self._width_base is None:
-        #         raise Exception("Base not set.")
-        #     return self._width_base
-        #
-        # @width_base.setter
-        # def width_base(self, value):
-        #     self._width_base = value
-        #
-        #     for measurement in (self.right, self.left):
-        #         measurement.base = value
-        #
-        # @property
-        # def height_base(self):
-        #     if self._height_base is None:
-        #         raise Exception("Base not set.")
-        #     return self._height_base
-        #
-        # @height_base.setter
-        # def height_base(self, value):
-        #     self._height_base = value
-        #
-        #     for measurement in (self.top, self.bottom):
-        #         measurement.base = value
-        #
-        # @property
-        # def width(self):
-        #     return self.left + self.right
-        #
-        # @property
-        # def height(self):
-        #     return self.top + self.bottom
+            top = right = bottom = left = None
+
+        top = FlexMeasurement.parse(top)
+        right = FlexMeasurement.parse(right)
+        bottom = FlexMeasurement.parse(bottom)
+        left = FlexMeasurement.parse(left)
+
+        object.__setattr__(self, "top", top)
+        object.__setattr__(self, "right", right)
+        object.__setattr__(self, "bottom", bottom)
+        object.__setattr__(self, "left", left)
+        object.__setattr__(self, "width", right + left)
+        object.__setattr__(self, "height", top + bottom)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("FlexFrame is immutable.")
+
+    def __delattr__(self, item):
+        raise AttributeError("FlexFrame is immutable.")
+
+    def __add__(self, other):
+        return FlexFrame.of(
+            self.top + other.top,
+            self.right + other.right,
+            self.bottom + other.bottom,
+            self.left + other.left
+        )
+
+    def __eq__(self, other):
+        if isinstance(other, FlexFrame):
+            return self.sides == other.sides
+        return False
+
+    def __hash__(self):
+        return hash(self.sides)
+
+    def __reduce__(self):
+        return FlexFrame.of, self.sides
+
+    def __repr__(self):
+        return "FlexFrame(%s, %s, %s, %s)" % self.sides
+
+    @property
+    def sides(self):
+        return self.top, self.right, self.bottom, self.left
+
+    def resolve(self, width_base, height_base):
+        return ResolvedFrame(
+            self.top.resolve(height_base),
+            self.right.resolve(width_base),
+            self.bottom.resolve(height_base),
+            self.left.resolve(width_base)
+        )
+
+    @staticmethod
+    def of(top, right, bottom, left):
+        key = (top, right, bottom, left)
+        try:
+            return _interned_frames[key]
+        except KeyError:
+            frame = FlexFrame(top, right, bottom, left)
+            if len(_interned_frames) < INTERN_LIMIT:
+                _interned_frames[key] = frame
+            return frame
+
+    @staticmethod
+    def parse(value):
+        if isinstance(value, FlexFrame):
+            return value
+
+        if type(value) in (str, int, float, FlexMeasurement, CompoundFlexMeasurement) or value is None:
+            measurements = (value,)
+        else:
+            measurements = tuple(value)
+
+        key = tuple((type(m), m) for m in measurements)
+        try:
+            return _interned_frame_literals[key]
+        except KeyError:
+            pass
+        except TypeError:
+            key = None
+
+        frame = FlexFrame(*measurements)
+        frame = FlexFrame.of(*frame.sides)
+        if key is not None and len(_interned_frame_literals) < INTERN_LIMIT:
+            _interned_frame_literals[key] = frame
+        return frame
 
 
 class FlexFrameDescriptor:
     def __init__(self):
-        self.values = WeakKeyDictionary()
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = "_%s_value" % name
 
     def __get__(self, instance, owner):
-        if instance not in self.values:
-            self.values[instance] = FlexFrame()
+        if instance is None:
+            return self
 
-        return self.values[instance]
+        try:
+            return getattr(instance, self.name)
+        except AttributeError:
+            return FlexFrame.parse(None)
 
     def __set__(self, instance, value):
-        if not isinstance(value, FlexFrame):
-            if type(value) in (str, int, float, FlexMeasurement, CompoundFlexMeasurement) or value is None:
-                value = FlexFrame(value)
-            else:
-                value = FlexFrame(*value)
-
-        self.values[instance] = value
+        setattr(instance, self.name, FlexFrame.parse(value))
+        invalidate_wrap(instance)
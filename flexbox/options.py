@@ -1,5 +1,7 @@
 from fortnum.fortnum import Fortnum
 
+from flexbox.cache import invalidate_wrap
+
 
 class FlexDirection(Fortnum):
     class Row(Fortnum):
@@ -139,5 +141,36 @@ class AlignContent(Fortnum):
 
 
 class FlexWrap(Fortnum):
-    NoWrap = Fortnum("NoWrap")
-    Wrap = Fortnum("Wrap")
+    class NoWrap(Fortnum):
+        pass
+
+    class Wrap(Fortnum):
+        pass
+
+
+class OptionDescriptor:
+    def __init__(self, attr, fortnum, default=None, allow_none=False):
+        self.attr = attr
+        self.fortnum = fortnum
+        self.default = default
+        self.allow_none = allow_none
+        self.name = "_%s_value" % attr
+
+    def __set__(self, instance, value):
+        if value is None:
+            if not self.allow_none and not self.default:
+                raise ValueError("None not allowed.")
+        elif value not in self.fortnum:
+            raise ValueError("'%s' is not a valid option for '%s'. Try %s" % (value, self.attr, list(self.fortnum)))
+
+        setattr(instance, self.name, value)
+        invalidate_wrap(instance)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        value = getattr(instance, self.name, None)
+        if value is None:
+            return self.default
+        return value
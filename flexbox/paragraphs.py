@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+from reportlab.platypus.flowables import _FUZZ
+
+from flexbox.cache import CacheInfo
+
+
+PARAGRAPH_CACHE_LIMIT = 1024
+_line_breaks = OrderedDict()
+paragraph_cache_info = CacheInfo()
+
+
+def style_fingerprint(style):
+    """A hashable summary of every attribute of a paragraph style that affects its layout."""
+    return repr(tuple(sorted(
+        (key, value) for key, value in vars(style).items() if key not in ("name", "parent")
+    )))
+
+
+def wrap_paragraph(paragraph, key, avail_width, avail_height):
+    """
+    Wrap a reportlab Paragraph, reusing the lines of an earlier paragraph with the same key (text and style fingerprint)
+    wrapped at the same width. The most recently used results are kept across documents.
+    """
+    if key is None or avail_width < _FUZZ or paragraph.style.wordWrap == "RTL":
+        # Right to left lines are reversed in place when drawn and can't be shared.
+        return paragraph.wrap(avail_width, avail_height)
+
+    key = key + (avail_width,)
+    lines = _line_breaks.get(key)
+    if lines is not None:
+        paragraph_cache_info.hits += 1
+        _line_breaks.move_to_end(key)
+        paragraph.width, paragraph.height, paragraph.blPara, paragraph._wrapWidths = lines
+        return paragraph.width, paragraph.height
+
+    paragraph_cache_info.misses += 1
+    width, height = paragraph.wrap(avail_width, avail_height)
+    _line_breaks[key] = (paragraph.width, paragraph.height, paragraph.blPara, paragraph._wrapWidths)
+    if len(_line_breaks) > PARAGRAPH_CACHE_LIMIT:
+        _line_breaks.popitem(last=False)
+    return width, height
+
+
+def clear_paragraph_cache():
+    _line_breaks.clear()
+    paragraph_cache_info.clear()
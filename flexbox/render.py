@@ -0,0 +1,269 @@
+from heapq import heappop, heappush
+
+from reportlab.platypus import Flowable
+
+from flexbox.flex import FlexItem, FlexBox, black, background_rect, border_path, border_paths, border_sides
+from flexbox.display import draw_flowable
+from flexbox.flex_flowable import FlexFlowable
+from flexbox.state import state_canvas
+
+
+# Sizes are sums of floats, items touching each other may overlap by a rounding error.
+EPSILON = 1e-6
+
+
+class BatchRenderer:
+    """
+    Draws a tree of FlexItems with as few canvas operations as possible, to be used as the renderer of a FlexBox:
+
+        FlexBox(*items, renderer=BatchRenderer)
+
+    Every item is drawn at absolute coordinates within the box instead of translating the canvas three times per item,
+    and the passes that draw nothing are skipped. The backgrounds of siblings that don't overlap are filled together,
+    one path per color, and so are their borders (see border_paths). The result looks the same as FlexItem.draw,
+    operators aside. Subclasses drawing themselves (overriding draw, draw_background, draw_border or drawOn) are drawn
+    by their own methods.
+    """
+    def __init__(self, canv):
+        self.canv = state_canvas(canv)
+        self.contained = {}
+        self.root = None
+
+    def draw(self, item):
+        self.root = item
+        self.draw_group([(item, 0, 0, None)])
+
+    def draw_group(self, placed):
+        if len(placed) > 1 and not self.disjoint(placed):
+            # Something drawn for one of the items can end up over another, so they are drawn in order.
+            for flowable in placed:
+                self.draw_group([flowable])
+            return
+
+        backgrounds = {}
+        borders = {}
+        for item, x, y, hidden in placed:
+            if self.folds(item):
+                self.collect(item, x, y, hidden, backgrounds, borders)
+
+        self.fill(backgrounds)
+        for item, x, y, hidden in placed:
+            self.draw_content(item, x, y, hidden)
+        self.stroke(borders)
+
+    def collect(self, item, x, y, hidden, backgrounds, borders):
+        margin = item.layout.margin
+        border = item.layout.border
+        x += margin.left
+        y += margin.bottom
+        width = item.width - margin.width
+        height = item.height - margin.height
+
+        if item.background_color:
+            rect_x, rect_y, rect_width, rect_height = background_rect(border, width, height, hidden)
+            backgrounds.setdefault(item.background_color, []).append((x + rect_x, y + rect_y, rect_width, rect_height))
+
+        if hidden:
+            border = tuple(0 if side_hidden else side for side, side_hidden in zip(border, hidden))
+        if any(border):
+            borders.setdefault(item.border_color or black, []).append((x, y, width, height, border))
+
+    def draw_content(self, item, x, y, hidden):
+        if not self.folds(item):
+            if hidden is None:
+                item.drawOn(self.canv, x, y)
+            else:
+                item.hidden_border = hidden
+                item.drawOn(self.canv, x, y)
+                del item.hidden_border
+            return
+
+        frame = item.layout.frame
+        x += frame.left
+        y += frame.bottom
+        draw_content = type(item).draw_content
+
+        if draw_content is FlexBox.draw_content:
+            if item.collapse_borders:
+                collapsed = item.collapsed_borders()
+            else:
+                collapsed = [None] * len(item.arrangement)
+            self.draw_group([
+                (child, x + child_x, y + child_y, hidden)
+                for (child, child_x, child_y), hidden in zip(item.arrangement, collapsed)
+            ])
+        elif draw_content is FlexFlowable.draw_content:
+            draw_flowable(
+                self.canv,
+                item.flowable,
+                x + item.vertical_align.point(item.content_width, item.width - frame.width),
+                y + item.horizontal_align.point(item.content_height, item.height - frame.height)
+            )
+        elif draw_content is not FlexItem.draw_content:
+            self.canv.saveState()
+            self.canv.translate(x, y)
+            item.canv = self.canv
+            item.draw_content(item.width - frame.width, item.height - frame.height, item.content_width,
+                              item.content_height)
+            del item.canv
+            self.canv.restoreState()
+
+    def folds(self, item):
+        # Items drawn as forms draw themselves, except for the one the renderer was given, which may be recorded as one.
+        return foldable(item) and (not item.form or item is self.root)
+
+    def fill(self, backgrounds):
+        if not backgrounds:
+            return
+
+        self.canv.saveState()
+        for color, rects in backgrounds.items():
+            self.canv.setFillColor(color)
+            path = self.canv.beginPath()
+            for rect in rects:
+                path.rect(*rect)
+            self.canv.drawPath(path, stroke=0, fill=1)
+        self.canv.restoreState()
+
+    def stroke(self, borders):
+        if not borders:
+            return
+
+        self.canv.saveState()
+        self.canv.setLineJoin(0)
+        for color, boxes in borders.items():
+            self.canv.setStrokeColor(color)
+            if getattr(color, "alpha", 1) == 1:
+                for width, paths in merged_border_paths(boxes).items():
+                    self.canv.setLineWidth(width)
+                    path = self.canv.beginPath()
+                    for points, closed in paths:
+                        border_path(path, points, closed)
+                    self.canv.drawPath(path, stroke=1, fill=0)
+            else:
+                # Where translucent lines cross, stroking them one by one blends the crossing twice.
+                for x, y, width, height, border in boxes:
+                    for line_width, ((x1, y1), (x2, y2)), _ in border_paths(border, width, height, joined=False):
+                        self.canv.setLineWidth(line_width)
+                        self.canv.line(x + x1, y + y1, x + x2, y + y2)
+        self.canv.restoreState()
+
+    def disjoint(self, placed):
+        """Whether nothing drawn for one of the placed flowables can overlap anything drawn for another."""
+        boxes = []
+        for item, x, y, _ in placed:
+            if not self.is_contained(item):
+                return False
+            boxes.append((x, x + float(item.width), y, y + float(item.height)))
+
+        # Sweep from left to right, comparing each box to the boxes it overlaps horizontally.
+        boxes.sort()
+        active = []
+        for x1, x2, y1, y2 in boxes:
+            while active and active[0][0] <= x1 + EPSILON:
+                heappop(active)
+            for _, other_y1, other_y2 in active:
+                if y1 < other_y2 - EPSILON and other_y1 < y2 - EPSILON:
+                    return False
+            heappush(active, (x2, y1, y2))
+        return True
+
+    def is_contained(self, item):
+        """Whether everything drawn for a flowable stays within its width and height."""
+        if not isinstance(item, FlexItem):
+            return True
+
+        contained = self.contained.get(id(item))
+        if contained is None:
+            contained = self.contained[id(item)] = self.measure_containment(item)
+        return contained
+
+    def measure_containment(self, item):
+        layout = item.layout
+        margin, border, frame = layout.margin, layout.border, layout.frame
+        if min(margin) < 0 or min(border) < 0:
+            return False
+
+        if item.width - margin.width < border.width or item.height - margin.height < border.height:
+            return False
+
+        top, right, bottom, left = border
+        if item.background_color and (bottom > right + left or left > top + bottom):
+            # The background is offset by half the bottom border horizontally and half the left one vertically.
+            return False
+
+        avail_width = item.width - frame.width + EPSILON
+        avail_height = item.height - frame.height + EPSILON
+        if isinstance(item, FlexBox) and foldable(item) and type(item).draw_content is FlexBox.draw_content:
+            return all(
+                x > -EPSILON and y > -EPSILON and x + float(child.width) < avail_width and
+                y + float(child.height) < avail_height and self.is_contained(child)
+                for child, x, y in item.arrangement
+            )
+
+        return item.content_width < avail_width and item.content_height < avail_height
+
+
+def merged_border_paths(boxes):
+    """
+    The paths of the opaque borders of the same color of several items, (x, y, width, height, border) each, by line
+    width. Sides on the same line that touch or overlap, such as the top sides of a row of cells, are drawn as a single
+    line. What is left of each border is joined as by border_paths.
+    """
+    lines = {}
+    for index, (x, y, width, height, border) in enumerate(boxes):
+        for side, ((x1, y1), (x2, y2)) in enumerate(border_sides(border, width, height)):
+            if not border[side]:
+                continue
+            if y1 == y2:
+                key = (border[side], "-", round(y + y1, 6))
+                start, end = sorted((x + x1, x + x2))
+            else:
+                key = (border[side], "|", round(x + x1, 6))
+                start, end = sorted((y + y1, y + y2))
+            lines.setdefault(key, []).append((start, end, index, side))
+
+    paths = {}
+    merged = set()
+    for (line_width, direction, position), spans in lines.items():
+        spans.sort()
+        runs = [[spans[0]]]
+        end = spans[0][1]
+        for span in spans[1:]:
+            if span[0] <= end + EPSILON:
+                runs[-1].append(span)
+                end = max(end, span[1])
+            else:
+                runs.append([span])
+                end = span[1]
+
+        for run in runs:
+            if len(run) > 1:
+                start, end = run[0][0], max(span[1] for span in run)
+                if direction == "-":
+                    points = [(start, position), (end, position)]
+                else:
+                    points = [(position, start), (position, end)]
+                paths.setdefault(line_width, []).append((points, False))
+                merged.update((index, side) for _, _, index, side in run)
+
+    for index, (x, y, width, height, border) in enumerate(boxes):
+        border = tuple(0 if (index, side) in merged else border[side] for side in range(4))
+        for line_width, points, closed in border_paths(border, width, height):
+            paths.setdefault(line_width, []).append(([(x + px, y + py) for px, py in points], closed))
+
+    return paths
+
+
+def foldable(item):
+    """Whether the item is drawn by FlexItem.draw, which the renderer can draw at absolute coordinates."""
+    cls = type(item)
+    return (
+        isinstance(item, FlexItem) and
+        cls.draw is FlexItem.draw and
+        cls.draw_item in (FlexItem.draw_item, FlexBox.draw_item) and
+        cls.draw_background is FlexItem.draw_background and
+        cls.draw_border is FlexItem.draw_border and
+        cls.drawOn is Flowable.drawOn and
+        not getattr(item, "_showBoundary", None)
+    )
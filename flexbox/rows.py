@@ -0,0 +1,133 @@
+from bisect import bisect_left
+from itertools import accumulate
+
+
+class ItemView:
+    """
+    A read-only view of items[start:stop]. Views of views refer to the underlying sequence directly, so splitting a box
+    again and again never copies its items.
+    """
+    __slots__ = ("items", "start", "stop")
+
+    def __init__(self, items, start=0, stop=None):
+        stop = len(items) if stop is None else stop
+        if isinstance(items, ItemView):
+            items, start, stop = items.items, items.start + start, items.start + stop
+
+        self.items = items
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __iter__(self):
+        return map(self.items.__getitem__, range(self.start, self.stop))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            indices = range(self.start, self.stop)[index]
+            if indices.step == 1:
+                return ItemView(self.items, indices.start, indices.start + len(indices))
+            return [self.items[i] for i in indices]
+        return self.items[range(self.start, self.stop)[index]]
+
+    def __repr__(self):
+        return "%s(%d:%d)" % (self.__class__.__name__, self.start, self.stop)
+
+
+class FlexRow(ItemView):
+    __slots__ = ("width", "height")
+
+    def __init__(self, items, start=0, stop=None, width=None, height=None):
+        super().__init__(items, start, stop)
+        self.width = width
+        self.height = height
+
+
+def measure_rows(main_lengths, cross_lengths, available, wrap):
+    """
+    Break items into rows along the main axis and measure them. Returns (start, stop, main_length, cross_length) for
+    each row, where main_length is the sum and cross_length the max of the item lengths in the row.
+    """
+    if not wrap:
+        return [(0, len(main_lengths), sum(main_lengths), max(cross_lengths))]
+
+    rows = []
+    start = 0
+    row_length = 0
+    for index, length in enumerate(main_lengths):
+        previous_length = row_length
+        row_length += length
+        if row_length > available and index > start:
+            rows.append((start, index, previous_length, max(cross_lengths[start:index])))
+            start = index
+            row_length = length
+    rows.append((start, len(main_lengths), row_length, max(cross_lengths[start:])))
+    return rows
+
+
+class FlexPages:
+    """
+    Page-break index of a FlexBox: the cumulative heights of its rows (or of the items of its single column) and the
+    widest of them from each one onwards. Where a page ends and how large the remainder is are found by binary search
+    and lookups instead of scans, so paginating a long box costs O(N) in total.
+    """
+    __slots__ = ("units", "rows", "widths", "offsets", "remaining_widths")
+
+    def __init__(self, units, widths, heights, rows=True):
+        self.units = units
+        self.rows = rows
+        self.widths = widths
+        self.offsets = list(accumulate(heights))
+        self.remaining_widths = list(accumulate(reversed(widths), max))[::-1]
+
+    def __len__(self):
+        return len(self.units)
+
+    def offset(self, index):
+        return self.offsets[index - 1] if index else 0
+
+    def fit(self, start, stop, avail_height):
+        """The index of the first unit in start:stop that doesn't fit within avail_height."""
+        return bisect_left(self.offsets, self.offset(start) + avail_height, start, stop)
+
+    def size(self, start, stop):
+        if stop == len(self.units):
+            width = self.remaining_widths[start]
+        else:
+            width = max(self.widths[start:stop])
+        return width, self.offsets[stop - 1] - self.offset(start)
+
+    def items(self, start, stop):
+        if not self.rows:
+            return ItemView(self.units, start, stop)
+        if start == stop:
+            return ItemView(())
+        return ItemView(self.units[start].items, self.units[start].start, self.units[stop - 1].stop)
+
+    def flex_rows(self, start, stop):
+        if self.rows:
+            return ItemView(self.units, start, stop)
+        return [FlexRow(self.units, start, stop, *self.size(start, stop))]
+
+
+class FlexArrangement:
+    """
+    The placement of a FlexBox's items within its content area: the final (stretched) cross length of every row and
+    the (item, x, y) offset of every item, in drawing order.
+    """
+    __slots__ = ("row_lengths", "positions")
+
+    def __init__(self, row_lengths=(), positions=()):
+        self.row_lengths = row_lengths
+        self.positions = positions
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __repr__(self):
+        return "FlexArrangement(%d rows, %d items)" % (len(self.row_lengths), len(self.positions))
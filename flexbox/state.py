@@ -0,0 +1,86 @@
+from reportlab.lib.colors import Color
+from reportlab.pdfgen.canvas import Canvas
+
+
+class StateCanvas:
+    """
+    A canvas that leaves out the operators setting a color, line width, line join or line cap the canvas already has.
+    Everything else is passed on to the wrapped canvas.
+
+    The canvas keeps track of its graphics state itself, saveState pushes it and restoreState pops it, so a value set
+    within a saved state is known to be gone after it is restored. Values changed another way, such as with
+    setFillColorRGB, are picked up from the canvas as well. Text objects keep their own colors, which platypus only
+    changes between saveState and restoreState.
+    """
+    def __init__(self, canv):
+        object.__setattr__(self, "_canvas", canv)
+
+    def __getattr__(self, name):
+        value = getattr(self._canvas, name)
+        if name in _forwarded:
+            # Methods are looked up once.
+            self.__dict__[name] = value
+        return value
+
+    def __setattr__(self, name, value):
+        self.__dict__.pop(name, None)
+        setattr(self._canvas, name, value)
+
+    def setFillColor(self, color, alpha=None):
+        canv = self._canvas
+        if canv._enforceColorSpace:
+            color = canv._enforceColorSpace(color)
+        if not same_color(color, canv._fillColorObj):
+            canv.setFillColor(color, alpha)
+        elif alpha is not None:
+            canv.setFillAlpha(alpha)
+        elif getattr(color, "alpha", None) is not None:
+            canv.setFillAlpha(color.alpha)
+
+    def setStrokeColor(self, color, alpha=None):
+        canv = self._canvas
+        if canv._enforceColorSpace:
+            color = canv._enforceColorSpace(color)
+        if not same_color(color, canv._strokeColorObj):
+            canv.setStrokeColor(color, alpha)
+        elif alpha is not None:
+            canv.setStrokeAlpha(alpha)
+        elif getattr(color, "alpha", None) is not None:
+            canv.setStrokeAlpha(color.alpha)
+
+    def setLineWidth(self, width):
+        if width != self._canvas._lineWidth:
+            self._canvas.setLineWidth(width)
+
+    def setLineJoin(self, mode):
+        if mode != self._canvas._lineJoin:
+            self._canvas.setLineJoin(mode)
+
+    def setLineCap(self, mode):
+        if mode != self._canvas._lineCap:
+            self._canvas.setLineCap(mode)
+
+
+def state_canvas(canv):
+    """The canvas wrapped in a StateCanvas, unless it is one already or another kind of canvas."""
+    if isinstance(canv, StateCanvas) or not isinstance(canv, Canvas):
+        return canv
+    return StateCanvas(canv)
+
+
+_forwarded = frozenset((
+    "saveState", "restoreState", "translate", "rect", "line", "beginPath", "drawPath", "drawImage", "drawText",
+    "beginText"
+))
+
+
+def same_color(color, current):
+    # The canvas starts out with an RGB tuple, and setFillGray and setStrokeGray set one.
+    color = rgb_color(color)
+    return isinstance(color, Color) and color == rgb_color(current)
+
+
+def rgb_color(color):
+    if isinstance(color, tuple) and len(color) == 3:
+        return Color(*color)
+    return color
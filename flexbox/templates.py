@@ -0,0 +1,158 @@
+from collections import ChainMap
+from copy import copy
+from string import Formatter
+
+from flexbox.flex import FlexItem, FlexBox
+from flexbox.flex_flowable import FlexParagraph, FlexImage
+from flexbox.options import OptionDescriptor
+
+
+ELEMENTS = {
+    "item": FlexItem,
+    "box": FlexBox,
+    "paragraph": FlexParagraph,
+    "image": FlexImage,
+}
+
+# The content of an element that is bound to the data a template is instantiated with, and whether "{name}" binds the
+# value itself (images may be paths, bytes or file-like objects) rather than its text.
+BOUND_FIELDS = (
+    (FlexParagraph, "text", False),
+    (FlexImage, "image", True),
+)
+
+_formatter = Formatter()
+
+
+class Binding:
+    """A field formatted with the data. If raw, "{name}" binds the value itself."""
+    __slots__ = ("attr", "text", "name")
+
+    def __init__(self, attr, text, raw=False):
+        self.attr = attr
+        self.text = text
+        fields = list(_formatter.parse(text))
+        if raw and len(fields) == 1 and fields[0][0] == "" and fields[0][2] == "" and fields[0][3] is None:
+            self.name = fields[0][1]
+        else:
+            self.name = None
+
+    @staticmethod
+    def is_bound(text):
+        return isinstance(text, str) and any(field is not None for _, field, _, _ in _formatter.parse(text))
+
+    def value(self, data):
+        if self.name is not None:
+            return data[self.name]
+        return self.text.format_map(data)
+
+
+class TemplateNode:
+    """
+    A compiled element. `state` is the pickled state of a prototype built once by the constructor, so instances skip
+    parsing their measurements, frames, colors and options and only fill in their bindings and items. Those are
+    immutable and shared, each instance gets its own copy of the rest.
+    """
+    __slots__ = ("cls", "state", "bindings", "items", "each")
+
+    def __init__(self, cls, state, bindings=(), items=None, each=None):
+        self.cls = cls
+        self.state = state
+        self.bindings = bindings
+        self.items = items
+        self.each = each
+
+    def instantiate(self, data):
+        state = self.state.copy()
+        if "kwargs" in state:
+            state["kwargs"] = state["kwargs"].copy()
+        if state.get("_flowable") is not None:
+            # Flowables hold the size they were last wrapped to, like in FlexFlowable.clone_item.
+            state["_flowable"] = copy(state["_flowable"])
+
+        item = self.cls.__new__(self.cls)
+        item.__setstate__(state)
+
+        for binding in self.bindings:
+            setattr(item, binding.attr, binding.value(data))
+
+        if self.items is not None:
+            if self.each is None:
+                item.items = tuple(node.instantiate(data) for node in self.items)
+            else:
+                item.items = tuple(
+                    node.instantiate(ChainMap(element, data))
+                    for element in data[self.each] for node in self.items
+                )
+
+        return item
+
+
+class Template:
+    """
+    A layout compiled from a declarative spec by compile_template. Instantiate it with the data of each document:
+
+        invoice = compile_template({"type": "box", "flex_direction": "Column", "items": [
+            {"type": "paragraph", "text": "Invoice {number}", "style": "h1"},
+            {"type": "box", "each": "lines", "items": [
+                {"type": "paragraph", "text": "{description}", "style": "body", "width": "70%"},
+                {"type": "paragraph", "text": "{amount}", "style": "body"},
+            ]},
+        ]}, styles={"h1": h1, "body": body})
+
+        story = [invoice.instantiate({"number": 1, "lines": [{"description": "Apples", "amount": "1.00"}]})]
+    """
+    def __init__(self, root):
+        self.root = root
+
+    def instantiate(self, data=None):
+        return self.root.instantiate(data if data is not None else {})
+
+
+def compile_template(spec, styles=None, elements=None):
+    """
+    Compile a spec of nested dicts, as loaded from JSON, into a Template.
+
+    Each dict is an element. "type" is one of "item", "box", "paragraph" and "image" (or a name in `elements`, or a
+    FlexItem subclass), "items" are the elements of a box and "each" names a list in the data to repeat the items of
+    a box for, every element of which is a dict of data for its items. Options are given by name ("Column") and
+    paragraph styles by their name in `styles`. Every other key is passed to the constructor. Text and images are
+    bound to the data with format strings.
+    """
+    return Template(_compile(spec, dict(ELEMENTS, **(elements or {})), styles or {}))
+
+
+def _compile(spec, elements, styles):
+    spec = dict(spec)
+    cls = spec.pop("type", "box" if "items" in spec else "item")
+    if not isinstance(cls, type):
+        if cls not in elements:
+            raise ValueError("'%s' is not a valid element type. Try %s" % (cls, list(elements)))
+        cls = elements[cls]
+
+    items = spec.pop("items", None)
+    each = spec.pop("each", None)
+    if (items is not None or each is not None) and not issubclass(cls, FlexBox):
+        raise ValueError("Only boxes have items, not '%s'." % cls.__name__)
+
+    for key, value in spec.items():
+        if isinstance(value, str):
+            if isinstance(getattr(cls, key, None), OptionDescriptor):
+                spec[key] = getattr(getattr(cls, key).fortnum, value, value)
+            elif key == "style":
+                spec[key] = styles[value]
+
+    bindings = []
+    for element_cls, attr, raw in BOUND_FIELDS:
+        if issubclass(cls, element_cls) and Binding.is_bound(spec.get(attr)):
+            bindings.append(Binding(attr, spec[attr], raw))
+            spec[attr] = ""
+
+    prototype = cls(**spec)
+    return TemplateNode(
+        cls,
+        prototype.__getstate__(),
+        tuple(bindings),
+        tuple(_compile(item, elements, styles) for item in items or ()) if issubclass(cls, FlexBox) else None,
+        each
+    )
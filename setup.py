@@ -17,7 +17,7 @@ setup(
     author='Sverker Sjöberg',
     url='https://github.com/SverkerSbrg/reportlab-flexbox',
     license='MIT',
-    packages=find_packages(exclude=['tests']),
+    packages=find_packages(exclude=['tests', 'benchmarks']),
     zip_safe=False,
     install_requires=[
         "reportlab",
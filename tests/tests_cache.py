@@ -0,0 +1,214 @@
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from reportlab.platypus import Spacer
+
+from flexbox import FlexBox, FlexItem, FlexFlowable, FlexImage, FlexWrap, FlexDirection, AlignItems, wrap_cache_info
+from tests.tests_images import encode
+
+
+class CountingItem(FlexItem):
+    def __init__(self, *args, **kwargs):
+        self.wrap_content_calls = 0
+        super().__init__(*args, **kwargs)
+
+    def wrap_content(self, avail_width, avail_height):
+        self.wrap_content_calls += 1
+        return super().wrap_content(avail_width, avail_height)
+
+
+class WrapCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        wrap_cache_info.clear()
+
+    def test_repeated_wrap_hits_cache(self):
+        item = CountingItem(width="50%", height=10)
+        self.assertEqual(item.wrap(100, 100), (50, 10))
+        self.assertEqual(item.wrap(100, 100), (50, 10))
+        self.assertEqual(item.wrap_content_calls, 1)
+        self.assertEqual(wrap_cache_info.hits, 1)
+        self.assertEqual(wrap_cache_info.misses, 1)
+
+    def test_nested_children_not_rewrapped(self):
+        children = [CountingItem(width="50%", height=10) for _ in range(4)]
+        box = FlexBox(*children, flex_wrap=FlexWrap.Wrap, width="100%")
+        for _ in range(3):
+            self.assertEqual(box.wrap(100, 100), (100, 20))
+        for child in children:
+            self.assertEqual(child.wrap_content_calls, 1)
+
+    def test_restore_previous_size(self):
+        children = [CountingItem(width="50%", height=10) for _ in range(4)]
+        box = FlexBox(*children, flex_wrap=FlexWrap.Wrap, width="100%")
+        box.wrap(100, 100)
+        box.wrap(200, 100)
+        self.assertEqual([child.width for child in children], [100, 100, 100, 100])
+        self.assertEqual(box.wrap(100, 100), (100, 20))
+        self.assertEqual([child.width for child in children], [50, 50, 50, 50])
+        self.assertEqual(len(box.rows), 2)
+        self.assertEqual(wrap_cache_info.misses, 10)
+
+    def test_shared_child_is_restored(self):
+        child = CountingItem(width="100%", height=10)
+        box1 = FlexBox(child, width=100)
+        box2 = FlexBox(child, width=50)
+        box1.wrap(1000, 1000)
+        box2.wrap(1000, 1000)
+        box1.wrap(1000, 1000)
+        self.assertEqual(child.width, 100)
+
+    def test_invalidate_on_measurement(self):
+        item = CountingItem(width=50, height=10)
+        item.wrap(100, 100)
+        item.flex_width = 70
+        self.assertEqual(item.wrap(100, 100), (70, 10))
+        self.assertEqual(item.wrap_content_calls, 2)
+
+    def test_invalidate_on_frame(self):
+        item = CountingItem(width=50, height=10)
+        item.wrap(100, 100)
+        item.padding = 5
+        self.assertEqual(item.wrap(100, 100), (50, 10))
+        self.assertEqual(item.wrap_content_calls, 2)
+
+    def test_invalidate_on_nested_change(self):
+        item = CountingItem(width=50, height=10)
+        box = FlexBox(FlexBox(item))
+        self.assertEqual(box.wrap(100, 100), (50, 10))
+        item.flex_height = 20
+        self.assertEqual(box.wrap(100, 100), (50, 20))
+
+    def test_invalidate_on_option(self):
+        box = FlexBox(
+            CountingItem(width=50, height=10),
+            CountingItem(width=50, height=10),
+        )
+        self.assertEqual(box.wrap(100, 100), (100, 10))
+        box.flex_direction = FlexDirection.Column
+        self.assertEqual(box.wrap(100, 100), (50, 20))
+
+    def test_invalidate_on_align_self(self):
+        child = FlexItem(width=50, height=10)
+        box = FlexBox(FlexItem(width=50, height=30), child, align_items=AlignItems.FlexStart)
+        box.wrap(100, 100)
+        self.assertEqual(box.arrangement.positions[1], (child, 50, 20))
+        child.align_self = AlignItems.FlexEnd
+        box.wrap(100, 100)
+        self.assertEqual(box.arrangement.positions[1], (child, 50, 0))
+
+    def test_invalidate_on_items(self):
+        box = FlexBox(FlexItem(width=10, height=10), flex_direction=FlexDirection.Column)
+        self.assertEqual(box.wrap(100, 100), (10, 10))
+        box.items = (FlexItem(width=10, height=10), FlexItem(width=10, height=30))
+        self.assertEqual(box.wrap(100, 100), (10, 40))
+        self.assertEqual(len(box.rows[0]), 2)
+
+    def test_invalidate_on_flowable(self):
+        item = FlexFlowable(Spacer(10, 10))
+        self.assertEqual(item.wrap(100, 100), (10, 10))
+        item.flowable = Spacer(50, 50)
+        self.assertEqual(item.wrap(100, 100), (50, 50))
+
+
+class SplitTestCase(unittest.TestCase):
+    def setUp(self):
+        wrap_cache_info.clear()
+
+    def test_split_parts_reuse_rows(self):
+        children = [CountingItem(width="50%", height=10) for _ in range(10)]
+        box = FlexBox(*children, flex_wrap=FlexWrap.Wrap, width="100%")
+        box.wrap(100, 1000)
+
+        first, second = box.split(100, 25)
+        self.assertEqual(first.wrap(100, 25), (100, 20))
+        self.assertEqual(second.wrap(100, 400), (100, 30))
+        self.assertEqual(second.wrap(100, 800), (100, 30))
+        self.assertEqual([list(row) for row in second.rows], [children[4:6], children[6:8], children[8:]])
+        self.assertIs(second.items.items, box.items)
+        self.assertEqual(wrap_cache_info.misses, 14)
+        for child in children:
+            self.assertEqual(child.wrap_content_calls, 1)
+
+    def test_split_column_parts_reuse_sizes(self):
+        children = [CountingItem(width=10 * (i + 1), height=10) for i in range(6)]
+        box = FlexBox(*children, flex_direction=FlexDirection.Column)
+        box.wrap(100, 1000)
+
+        first, second = box.split(100, 25)
+        self.assertEqual(first.wrap(100, 25), (20, 20))
+        self.assertEqual(second.wrap(100, 500), (60, 40))
+        for child in children:
+            self.assertEqual(child.wrap_content_calls, 1)
+
+    def test_split_parts_rewrap_when_height_dependent(self):
+        children = [CountingItem(width="50%", height="10%") for _ in range(4)]
+        box = FlexBox(*children, flex_wrap=FlexWrap.Wrap, width="100%")
+        box.wrap(100, 100)
+
+        first, second = box.split(100, 15)
+        self.assertIsNone(second.premeasured)
+        self.assertEqual(second.wrap(100, 200), (100, 20))
+
+    def test_split_parts_rewrap_after_change(self):
+        children = [CountingItem(width="50%", height=10) for _ in range(4)]
+        box = FlexBox(*children, flex_wrap=FlexWrap.Wrap, width="100%")
+        box.wrap(100, 100)
+
+        first, second = box.split(100, 15)
+        children[3].flex_height = 20
+        self.assertEqual(second.wrap(100, 100), (100, 20))
+        self.assertEqual(children[3].wrap_content_calls, 2)
+
+    def test_split_parts_rewrap_at_other_width(self):
+        children = [CountingItem(width=50, height=10) for _ in range(4)]
+        box = FlexBox(*children, flex_wrap=FlexWrap.Wrap)
+        box.wrap(100, 100)
+
+        first, second = box.split(100, 15)
+        self.assertEqual(second.wrap(200, 100), (100, 10))
+
+    def test_split_plain_flowables(self):
+        box = FlexBox(*[Spacer(10, 30) for _ in range(10)], flex_direction=FlexDirection.Column)
+        box.wrap(100, 1000)
+
+        first, second = box.split(100, 100)
+        self.assertIsNone(second.premeasured)
+        self.assertEqual((len(first.items), len(second.items)), (3, 7))
+
+    def test_split_images_rewrap(self):
+        data = encode((100, 100), "PNG")
+        box = FlexBox(*[FlexImage(data, width=width) for width in (50, 50, 400, 400, 400)],
+                      flex_direction=FlexDirection.Column)
+        box.wrap(400, 200)
+
+        first, second = box.split(400, 200)
+        second.wrap(400, 1000)
+        self.assertEqual([(item.width, item.height) for item in second.items], [(400, 400)] * 3)
+
+
+class ConcurrentWrapTestCase(unittest.TestCase):
+    def setUp(self):
+        # Switch threads as often as possible, for the updates of the counters shared by every cache to interleave.
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-6)
+
+    def test_trees_laid_out_in_parallel(self):
+        heights = (10, 20, 30)
+
+        def layout(_):
+            leaves = [FlexItem(width="25%", height=10) for _ in range(8)]
+            box = FlexBox(FlexBox(*leaves, flex_wrap=FlexWrap.Wrap, width="100%"), width="100%")
+            sizes = []
+            for run in range(300):
+                leaves[0].flex_height = heights[run % 3]
+                sizes.append(box.wrap(100, 1000))
+                box.wrap(200, 1000)
+            return sizes
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(layout, range(16)))
+
+        expected = [(100, heights[run % 3] + 10) for run in range(300)]
+        for sizes in results:
+            self.assertEqual(sizes, expected)
@@ -0,0 +1,82 @@
+import unittest
+
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import Spacer
+
+from flexbox import FlexBox, FlexItem, FlexFlowable, FlexParagraph, FlexDirection, FlexWrap, wrap_cache_info
+from flexbox.batch import render_document
+
+
+body = ParagraphStyle("Body", fontSize=9, leading=11)
+
+
+def card(name, static=False):
+    return FlexBox(
+        FlexBox(
+            FlexParagraph("<b>Product</b>", body),
+            FlexItem(width=8, height=8, margin=2, background_color="#e77f24"),
+            padding=[2, 4], border=[0, 0, 1, 0], background_color="#eeeeee", static=static
+        ),
+        FlexParagraph(name, body, padding=4),
+        FlexBox(
+            *[FlexParagraph("Footnote %d" % i, body, width="25%") for i in range(4)],
+            flex_wrap=FlexWrap.Wrap, static=static
+        ),
+        flex_direction=FlexDirection.Column, border=0.5, margin=2
+    )
+
+
+class CloneTestCase(unittest.TestCase):
+    def test_clone_shares_style(self):
+        original = card("Name")
+        clone = original.clone()
+
+        self.assertIsNot(clone, original)
+        self.assertIsNot(clone.items[0], original.items[0])
+        self.assertIs(clone.border, original.border)
+        self.assertIs(clone.items[0].background_color, original.items[0].background_color)
+        self.assertIsNot(clone.wrap_cache, original.wrap_cache)
+
+    def test_clone_is_independent(self):
+        original = card("Name")
+        original.wrap(300, 500)
+        clone = original.clone()
+        clone.items[1].text = "A much longer name that needs more than a single line in this card " * 3
+
+        self.assertGreater(clone.wrap(300, 500)[1], original.wrap(300, 500)[1])
+        self.assertEqual(original.items[1].text, "Name")
+        self.assertIsNot(clone.items[1].flowable, original.items[1].flowable)
+
+    def test_static_parts_are_not_measured_again(self):
+        prototype = card("", static=True)
+        prototype.wrap(300, 500)
+        clone = prototype.clone()
+        clone.items[1].text = "Name"
+
+        misses = wrap_cache_info.misses
+        size = clone.wrap(300, 500)
+        # Only the card itself and the paragraph that changed.
+        self.assertEqual(wrap_cache_info.misses - misses, 2)
+        self.assertEqual(size, card("Name").wrap(300, 500))
+
+    def test_clones_draw_like_constructed_trees(self):
+        prototype = card("", static=True)
+        prototype.wrap(300, 500)
+
+        clones = []
+        for i in range(20):
+            clone = prototype.clone()
+            clone.items[1].text = "Row %d" % i
+            clones.append(clone)
+
+        self.assertEqual(
+            render_document(clones, invariant=True),
+            render_document([card("Row %d" % i) for i in range(20)], invariant=True)
+        )
+
+    def test_clone_copies_flowables(self):
+        original = FlexBox(FlexFlowable(Spacer(10, 10)), Spacer(5, 5))
+        clone = original.clone()
+        self.assertIsNot(clone.items[0].flowable, original.items[0].flowable)
+        self.assertIsNot(clone.items[1], original.items[1])
+        self.assertEqual(clone.wrap(100, 100), original.wrap(100, 100))
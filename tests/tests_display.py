@@ -0,0 +1,98 @@
+import pickle
+import random
+import unittest
+from io import BytesIO
+
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfgen.canvas import Canvas
+
+from flexbox import FlexBox, FlexItem, FlexParagraph, FlexWrap, BatchRenderer
+from flexbox.display import RecordingCanvas, record, FILL_COLOR, LINE_WIDTH, RECT, SAVE, RESTORE
+from tests.tests_render import RecordingCanvas as PaintingCanvas, random_tree, rendered
+
+
+body = ParagraphStyle("Body", fontSize=8, leading=10)
+
+
+def replayed(display_list, *positions):
+    canvas = PaintingCanvas()
+    for x, y in positions:
+        display_list.replay(canvas, x, y)
+    return canvas
+
+
+def drawn(box, *positions):
+    canvas = PaintingCanvas()
+    for x, y in positions:
+        box.drawOn(canvas, x, y)
+    return canvas
+
+
+class DisplayListTestCase(unittest.TestCase):
+    def test_replay_paints_the_same(self):
+        for seed in range(40):
+            box = random_tree(random.Random(seed))
+            box.renderer = BatchRenderer if seed % 2 else None
+            box.wrap(200, 1000)
+            positions = [(10, 20), (-5, 300)]
+            replay, draw = rendered(replayed(record(box), *positions), drawn(box, *positions))
+            self.assertEqual(replay, draw)
+
+    def test_empty_states_are_left_out(self):
+        box = FlexBox(*[FlexItem(width=10, height=10) for _ in range(10)])
+        box.wrap(100, 100)
+        self.assertEqual(len(record(box)), 0)
+
+    def test_redundant_state_is_left_out(self):
+        canvas = RecordingCanvas()
+        canvas.setFillColor(body.textColor)
+        canvas.rect(0, 0, 1, 1)
+        canvas.saveState()
+        canvas.setFillColor(body.textColor)
+        canvas.setLineWidth(2)
+        canvas.rect(0, 0, 1, 1)
+        canvas.restoreState()
+        canvas.setLineWidth(2)
+        canvas.rect(0, 0, 1, 1)
+        self.assertEqual(list(canvas.display_list().codes), [
+            FILL_COLOR, RECT, SAVE, LINE_WIDTH, RECT, RESTORE, LINE_WIDTH, RECT
+        ])
+
+    def test_flowables_keep_their_size(self):
+        paragraph = FlexParagraph("Some text that is wrapped to several lines", body)
+        paragraph.wrap(60, 100)
+        display_list = record(paragraph)
+        before = Canvas(BytesIO())
+        display_list.replay(before)
+
+        paragraph.wrap(300, 100)
+        after = Canvas(BytesIO())
+        display_list.replay(after)
+        self.assertEqual(before._code, after._code)
+        self.assertEqual((display_list.width, display_list.height), (60, 30))
+
+    def test_pickle(self):
+        box = FlexBox(
+            *[FlexParagraph("Cell %d" % i, body, width="25%", border=0.5) for i in range(8)],
+            flex_wrap=FlexWrap.Wrap, background_color="#eeeeee"
+        )
+        box.wrap(200, 200)
+        display_list = record(box)
+
+        restored = pickle.loads(pickle.dumps(display_list))
+        canvas, restored_canvas = Canvas(BytesIO()), Canvas(BytesIO())
+        display_list.replay(canvas, 20, 30)
+        restored.replay(restored_canvas, 20, 30)
+        self.assertEqual(canvas._code, restored_canvas._code)
+        self.assertTrue(any(code.startswith("BT") for code in canvas._code))
+
+    def test_canvas_methods(self):
+        canvas = RecordingCanvas()
+        canvas.setFont("Helvetica", 8)
+        canvas.drawString(0, 0, "Text")
+        pdf_canvas = Canvas(BytesIO())
+        canvas.display_list().replay(pdf_canvas)
+        self.assertTrue(any("(Text) Tj" in code for code in pdf_canvas._code))
+
+        with self.assertRaises(AttributeError):
+            canvas.beginText()
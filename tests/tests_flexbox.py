@@ -973,3 +973,19 @@ class FlexDirectionTestCase(FlexBoxTestCase):
 
 
 
+
+
+class SharedStyleTestCase(FlexBoxTestCase):
+    def test_items_share_style_values(self):
+        first = TestItem(width="50%", height=10, margin="10%")
+        second = TestItem(width="50%", height=10, margin="10%")
+        self.assertIs(first.margin, second.margin)
+        self.assertIs(first.flex_width, second.flex_width)
+
+    def test_shared_style_resolves_per_item(self):
+        first = TestItem(width="50%", height=10, margin="10%")
+        second = TestItem(width="50%", height=10, margin="10%")
+        self.assertEqual(first.wrap(200, 100), (100, 10))
+        self.assertEqual(second.wrap(400, 100), (200, 10))
+        self.assertEqual(first.layout.margin.left, 10)
+        self.assertEqual(second.layout.margin.left, 20)
@@ -0,0 +1,131 @@
+import unittest
+from io import BytesIO
+
+from reportlab.lib.colors import HexColor
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase.pdfdoc import xObjectName
+from reportlab.pdfgen.canvas import Canvas
+
+from flexbox import FlexBox, FlexItem, FlexParagraph, FlexWrap, BatchRenderer, render_document
+from flexbox.forms import form_cache_info, clear_forms
+
+
+body = ParagraphStyle("Body", fontSize=8, leading=10)
+
+
+def badge(text="New", color="#e77f24", form=True):
+    return FlexBox(
+        FlexItem(width=6, height=6, margin=2, background_color=color),
+        FlexParagraph(text, body),
+        width=60, border=0.5, border_color="#88499c", padding=2, form=form
+    )
+
+
+class Marker(FlexItem):
+    def draw_content(self, avail_width, avail_height, requested_width, requested_height):
+        self.canv.circle(avail_width / 2, avail_height / 2, 2)
+
+
+class KeyedMarker(Marker):
+    def form_key(self):
+        return super().form_key()
+
+
+def draw(*items, renderer=None):
+    canvas = Canvas(BytesIO(), pageCompression=0)
+    box = FlexBox(*items, flex_wrap=FlexWrap.Wrap, renderer=renderer)
+    box.wrap(500, 500)
+    box.drawOn(canvas, 0, 0)
+    return canvas
+
+
+def operators(canvas, name):
+    return [code for code in canvas._code if code.endswith(" " + name)]
+
+
+class FormTestCase(unittest.TestCase):
+    def setUp(self):
+        clear_forms()
+
+    def test_repeated_items_share_a_form(self):
+        canvas = draw(*[badge() for _ in range(10)])
+        self.assertEqual((form_cache_info.misses, form_cache_info.hits), (1, 9))
+        self.assertEqual(len(operators(canvas, "Do")), 10)
+        self.assertTrue(canvas.hasForm("FlexForm0"))
+        self.assertFalse(canvas.hasForm("FlexForm1"))
+
+    def test_forms_are_smaller(self):
+        sizes = []
+        for form in (False, True):
+            canvas = draw(*[badge(form=form) for _ in range(100)])
+            canvas.showPage()
+            canvas.save()
+            sizes.append(len(canvas._filename.getvalue()))
+        self.assertLess(sizes[1], sizes[0] / 2)
+
+    def test_form_draws_the_item(self):
+        inline = draw(badge(form=False))
+        canvas = draw(badge())
+        form = canvas._doc.idToObject[xObjectName("FlexForm0")]
+        preamble, content = form.stream.split(b"\n", 1)
+        self.assertIn(content, "\n".join(inline._code).encode())
+        self.assertGreater(content.count(b"\n"), 40)
+
+    def test_different_items(self):
+        draw(badge(), badge("Sale"), badge(color="#eeeeee"), badge(), FlexBox(badge(), width=80, form=True))
+        self.assertEqual((form_cache_info.misses, form_cache_info.hits), (4, 2))
+
+    def test_forms_are_per_document(self):
+        draw(badge())
+        draw(badge())
+        self.assertEqual((form_cache_info.misses, form_cache_info.hits), (2, 0))
+
+    def test_nested_forms(self):
+        canvas = draw(*[FlexBox(badge(), badge("Sale"), width=200, form=True) for _ in range(3)])
+        self.assertEqual((form_cache_info.misses, form_cache_info.hits), (3, 2))
+        canvas.showPage()
+        canvas.save()
+
+    def test_document(self):
+        story = [FlexBox(*[badge("Item %d" % (i % 5)) for i in range(400)], flex_wrap=FlexWrap.Wrap, width=130)]
+        self.assertTrue(render_document(story).startswith(b"%PDF"))
+        self.assertEqual((form_cache_info.misses, form_cache_info.hits), (5, 395))
+
+    def test_links_are_drawn_on_the_page(self):
+        canvas = draw(*[badge('<a href="https://example.com">New</a>') for _ in range(2)])
+        self.assertEqual(form_cache_info.misses, 0)
+        self.assertEqual(operators(canvas, "Do"), [])
+
+    def test_items_drawing_themselves(self):
+        draw(Marker(width=10, height=10, form=True), Marker(width=10, height=10, form=True))
+        self.assertEqual(form_cache_info.misses, 0)
+
+        draw(KeyedMarker(width=10, height=10, form=True), KeyedMarker(width=10, height=10, form=True))
+        self.assertEqual((form_cache_info.misses, form_cache_info.hits), (1, 1))
+
+    def test_initial_state_is_restored(self):
+        canvas = Canvas(BytesIO())
+        canvas.setStrokeColor(HexColor(0xff0000))
+        canvas.setLineWidth(3)
+        item = FlexItem(width=10, height=10, border=1, form=True)
+        item.wrap(100, 100)
+        item.drawOn(canvas, 0, 0)
+        self.assertEqual(canvas._code[-4:], ["0 0 0 RG", "1 w", "/FormXob.FlexForm0 Do", "Q"])
+
+    def test_translucent_state_is_drawn_inline(self):
+        canvas = Canvas(BytesIO())
+        canvas.setFillAlpha(0.5)
+        item = FlexItem(width=10, height=10, background_color="#eeeeee", form=True)
+        item.wrap(100, 100)
+        item.drawOn(canvas, 0, 0)
+        self.assertEqual(operators(canvas, "Do"), [])
+
+    def test_renderer(self):
+        canvas = draw(*[badge() for _ in range(4)], renderer=BatchRenderer)
+        self.assertEqual(len(operators(canvas, "Do")), 4)
+        self.assertEqual(form_cache_info.misses, 1)
+
+        clear_forms()
+        canvas = draw(FlexBox(FlexItem(width=10, height=10, background_color="#eeeeee"), renderer=BatchRenderer,
+                              form=True))
+        self.assertEqual(len(operators(canvas, "Do")), 1)
@@ -0,0 +1,206 @@
+import os
+import tempfile
+import unittest
+from io import BytesIO
+
+from reportlab.pdfgen.canvas import Canvas
+
+from PIL import Image as PILImage
+
+from flexbox import FlexImage
+from flexbox import images
+from flexbox.images import image_size, image_size_info, clear_image_sizes, probe_image_size, clear_image_resources, \
+    resampled_image, resampled_info, image_resource, pixel_size
+
+
+def encode(size, format, **kwargs):
+    stream = BytesIO()
+    PILImage.new("RGB", size, "#e77f24").save(stream, format, **kwargs)
+    return stream.getvalue()
+
+
+class ProbeImageSizeTestCase(unittest.TestCase):
+    def probe(self, data):
+        return probe_image_size(data[:512], lambda offset, length: data[offset:offset + length])
+
+    def test_formats(self):
+        for format, kwargs in (
+                ("JPEG", {}),
+                ("JPEG", {"progressive": True}),
+                ("JPEG", {"exif": b"Exif\x00\x00" + b"\x00" * 4000}),
+                ("PNG", {}),
+                ("GIF", {}),
+        ):
+            for size in ((1, 1), (160, 90), (33, 4000), (3000, 2)):
+                data = encode(size, format, **kwargs)
+                self.assertEqual(self.probe(data), size, (format, kwargs))
+                self.assertEqual(image_size(data), size)
+
+    def test_other_formats(self):
+        data = encode((20, 10), "BMP")
+        self.assertIsNone(self.probe(data))
+        self.assertEqual(image_size(data), (20, 10))
+
+    def test_malformed(self):
+        self.assertIsNone(self.probe(b""))
+        self.assertIsNone(self.probe(b"\xff\xd8\xff"))
+        self.assertIsNone(self.probe(b"\xff\xd8\x00\x00\x00"))
+
+
+class ImageSizeCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        clear_image_sizes()
+        clear_image_resources()
+        handle, self.path = tempfile.mkstemp(suffix=".png")
+        with os.fdopen(handle, "wb") as file:
+            file.write(encode((40, 20), "PNG"))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_path_is_cached(self):
+        images = [FlexImage(self.path) for _ in range(100)]
+        self.assertEqual(images[-1].aspect, 0.5)
+        self.assertEqual(image_size_info.misses, 1)
+        self.assertEqual(len({image.resource for image in images}), 1)
+
+    def test_modified_file_is_read_again(self):
+        self.assertEqual(image_size(self.path), (40, 20))
+        with open(self.path, "wb") as file:
+            file.write(encode((10, 30), "PNG"))
+        os.utime(self.path, ns=(0, 0))
+        self.assertEqual(image_size(self.path), (10, 30))
+        self.assertEqual(image_size_info.misses, 2)
+
+    def test_file_objects_are_not_cached(self):
+        stream = BytesIO(b"prefix" + encode((7, 3), "JPEG"))
+        stream.seek(6)
+        self.assertEqual(image_size(stream), (7, 3))
+        self.assertEqual(stream.tell(), 6)
+        self.assertEqual(image_size_info.misses, 0)
+
+
+class ImageResourceTestCase(unittest.TestCase):
+    def setUp(self):
+        clear_image_resources()
+
+    def test_rewrap_resizes_image(self):
+        image = FlexImage(encode((40, 20), "PNG"))
+        image.wrap(100, 100)
+        flowable = image.flowable
+        image.wrap(50, 100)
+        self.assertIs(image.flowable, flowable)
+        self.assertEqual((flowable.drawWidth, flowable.drawHeight), (50, 25))
+
+    def test_images_are_decoded_and_embedded_once(self):
+        data = encode((40, 20), "PNG")
+        images = [FlexImage(data, width=40, height=20) for _ in range(50)]
+        self.assertEqual(len({image.resource.reader for image in images}), 1)
+
+        output = BytesIO()
+        canvas = Canvas(output)
+        for image in images:
+            image.wrap(100, 100)
+            image.drawOn(canvas, 0, 0)
+            canvas.showPage()
+        canvas.save()
+        self.assertEqual(output.getvalue().count(b"/Subtype /Image"), 1)
+
+    def test_bytes_like_sources(self):
+        data = encode((40, 20), "PNG")
+        flex_images = [FlexImage(bytearray(data), width=20), FlexImage(memoryview(data), width=20), FlexImage(data)]
+        self.assertEqual(len({image.resource for image in flex_images}), 1)
+
+        canvas = Canvas(BytesIO())
+        for image in flex_images:
+            self.assertEqual(image.wrap(100, 100)[1], 10 if image.flex_width else 50)
+            image.drawOn(canvas, 0, 0)
+        canvas.save()
+
+    def test_bytes_are_not_kept_by_the_caches(self):
+        data = encode((40, 20), "PNG")
+        resource = image_resource(data)
+        self.assertEqual(image_resource(encode((40, 20), "PNG")), resource)
+        self.assertEqual(len(resource.key), 2)
+        self.assertNotIn(data, resource.key)
+        self.assertNotIn(data, [part for key in images._image_sizes for part in key])
+
+    def test_resources_are_limited_by_size(self):
+        self.addCleanup(setattr, images, "IMAGE_RESOURCE_BYTES", images.IMAGE_RESOURCE_BYTES)
+        sources = [encode((40 + i, 20), "PNG") for i in range(10)]
+        images.IMAGE_RESOURCE_BYTES = sum(len(source) for source in sources[-3:])
+
+        resources = [image_resource(source) for source in sources]
+        self.assertEqual(list(images._image_resources.values()), resources[-3:])
+
+        # Decoded, the last image alone takes more than the limit.
+        resources[-1].reader.getRGBData()
+        self.assertGreaterEqual(resources[-1].nbytes, len(sources[-1]) + 49 * 20 * 3)
+        resource = image_resource(sources[0])
+        self.assertEqual(list(images._image_resources.values()), [resource])
+
+def photo(size):
+    stream = BytesIO()
+    PILImage.effect_mandelbrot(size, (-2, -1.5, 1, 1.5), 50).convert("RGB").save(stream, "JPEG")
+    return stream.getvalue()
+
+
+def render(*flex_images):
+    output = BytesIO()
+    canvas = Canvas(output)
+    for image in flex_images:
+        image.wrap(72, 72)
+        image.drawOn(canvas, 0, 0)
+    canvas.save()
+    return output.getvalue()
+
+
+class ResampleTestCase(unittest.TestCase):
+    def setUp(self):
+        clear_image_resources()
+
+    def test_pixel_size(self):
+        self.assertEqual(pixel_size(72, 36, 150), (150, 75))
+        self.assertEqual(pixel_size(0.1, 0.1, 72), (1, 1))
+
+    def test_max_dpi_reduces_output(self):
+        data = photo((2000, 1500))
+        full = render(FlexImage(data))
+        resampled = render(FlexImage(data, max_dpi=150))
+        self.assertLess(len(resampled) * 10, len(full))
+        self.assertIn(b"/Width 150", resampled)
+        self.assertIn(b"/Filter [ /ASCII85Decode /DCTDecode ]", resampled)
+
+    def test_variants_are_cached(self):
+        data = photo((400, 300))
+        render(*(FlexImage(data, max_dpi=100) for _ in range(10)))
+        self.assertEqual(resampled_info.misses, 1)
+        self.assertEqual(resampled_info.hits, 9)
+
+    def test_images_are_not_enlarged(self):
+        resource = image_resource(photo((40, 30)))
+        self.assertIs(resampled_image(resource, (80, 60)), resource.reader)
+        self.assertEqual(resampled_info.misses, 0)
+
+    def test_transparency_is_kept(self):
+        stream = BytesIO()
+        PILImage.new("RGBA", (400, 400), (255, 0, 0, 128)).save(stream, "PNG")
+        reader = resampled_image(image_resource(stream.getvalue()), (40, 40))
+        self.assertEqual(reader.getSize(), (40, 40))
+        reader.getRGBData()
+        self.assertIsNotNone(reader._dataA)
+
+    def test_least_recently_used_variants_are_evicted(self):
+        resource = image_resource(photo((400, 300)))
+        limit, images.RESAMPLED_LIMIT = images.RESAMPLED_LIMIT, 2
+        try:
+            first = resampled_image(resource, (10, 10))
+            resampled_image(resource, (20, 20))
+            self.assertIs(resampled_image(resource, (10, 10)), first)
+            resampled_image(resource, (30, 30))
+            self.assertIs(resampled_image(resource, (10, 10)), first)
+            self.assertEqual(resampled_info.misses, 3)
+            resampled_image(resource, (20, 20))
+            self.assertEqual(resampled_info.misses, 4)
+        finally:
+            images.RESAMPLED_LIMIT = limit
@@ -0,0 +1,92 @@
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+from io import BytesIO
+
+from PIL import Image as PILImage
+from reportlab.pdfgen.canvas import Canvas
+
+from flexbox import FlexBox, FlexImage, FlexWrap, prefetch_images
+from flexbox.images import clear_image_resources
+from flexbox.loaders import FileLoader, BlobStoreLoader, LocalBlobStore, flex_images
+
+
+class LoaderTestCase(unittest.TestCase):
+    def setUp(self):
+        clear_image_resources()
+        self.root = tempfile.mkdtemp()
+        for index in range(16):
+            PILImage.new("RGB", (10 * (index + 1), 10), "#88499c").save(os.path.join(self.root, "%d.png" % index))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_file_loader(self):
+        image = FlexImage(os.path.join(self.root, "1.png"), loader=FileLoader())
+        self.assertEqual(image.wrap(100, 100), (100, 50))
+
+    def test_blob_store_loader(self):
+        store = LocalBlobStore(self.root)
+        loader = BlobStoreLoader(store, connections=2)
+        image = FlexImage("3.png", loader=loader)
+        self.assertEqual(image.wrap(100, 100), (100, 25))
+        self.assertIsInstance(image.resource.source, bytes)
+
+        canvas = Canvas(BytesIO())
+        image.drawOn(canvas, 0, 0)
+        canvas.save()
+
+        FlexImage("3.png", loader=loader).wrap(100, 100)
+        self.assertEqual(store.connections, 1)
+
+        loader.close()
+        self.assertTrue(loader.pool.idle.empty())
+
+    def test_pickled_loader_opens_its_own_connections(self):
+        loader = BlobStoreLoader(LocalBlobStore(self.root), connections=2)
+        image = FlexImage("3.png", loader=loader)
+        image.wrap(100, 100)
+
+        restored = pickle.loads(pickle.dumps(image))
+        self.assertIsNone(restored._resource)
+        self.assertEqual(restored.loader.pool.size, 2)
+        self.assertTrue(restored.loader.pool.idle.empty())
+        self.assertEqual(restored.wrap(100, 100), (100, 25))
+
+    def test_blob_store_stays_in_root(self):
+        loader = BlobStoreLoader(LocalBlobStore(self.root))
+        with self.assertRaises(KeyError):
+            loader.load("../secret.png")
+
+    def test_flex_images(self):
+        images = [FlexImage("%d.png" % index) for index in range(3)]
+        tree = FlexBox(images[0], FlexBox(images[1], FlexBox(images[2])))
+        self.assertEqual(set(flex_images(tree)), set(images))
+
+    def test_prefetch_concurrently(self):
+        store = LocalBlobStore(self.root, latency=0.02)
+        loader = BlobStoreLoader(store, connections=8)
+        images = [FlexImage("%d.png" % (index % 16), loader=loader) for index in range(64)]
+        tree = FlexBox(*images, flex_wrap=FlexWrap.Wrap)
+
+        start = time.perf_counter()
+        prefetch_images(tree, workers=8)
+        # 16 images with two requests each, 8 at a time, take around 4 round trips (plus connecting).
+        self.assertLess(time.perf_counter() - start, 16 * 2 * 0.02)
+        self.assertLessEqual(store.connections, 8)
+
+        self.assertTrue(all(image._resource is not None for image in images))
+        self.assertIs(images[0].resource, images[16].resource)
+
+        self.assertEqual(store.requests, 32)
+        tree.wrap(500, 500)
+        self.assertEqual(store.requests, 32)
+
+    def test_prefetch_errors_are_raised_on_use(self):
+        image = FlexImage("missing.png", loader=BlobStoreLoader(LocalBlobStore(self.root)))
+        prefetch_images(image)
+        with self.assertRaises(FileNotFoundError):
+            image.wrap(100, 100)
@@ -68,3 +68,76 @@ class FrameTestCase(unittest.TestCase):
         self.assertFrame(FlexFrame(5, "10%", 10, 15), (5, 0), (0, 0.1), (10, 0), (15, 0))
 
 
+
+
+class CompoundFlexMeasurementTestCase(unittest.TestCase):
+    def test_add(self):
+        measurement = FlexMeasurement.parse(10) + "20%" + 5
+        self.assertEqual(measurement.static, 15)
+        self.assertEqual(measurement.relative, 0.2)
+        self.assertEqual(measurement.resolve(100), 35)
+
+    def test_sub(self):
+        measurement = FlexMeasurement.parse(10) - FlexMeasurement.parse("20%")
+        self.assertEqual(measurement.static, 10)
+        self.assertEqual(measurement.relative, -0.2)
+
+    def test_nested(self):
+        inner = FlexMeasurement.parse(10) + FlexMeasurement.parse("10%")
+        measurement = (inner + inner) - (FlexMeasurement.parse(5) + inner)
+        self.assertEqual(measurement.static, 5)
+        self.assertAlmostEqual(measurement.relative, 0.1)
+
+    def test_unset(self):
+        self.assertFalse(FlexMeasurement.parse(None) + FlexMeasurement.parse(None))
+        self.assertTrue(FlexMeasurement.parse(None) + FlexMeasurement.parse(0))
+
+    def test_frame_resolve(self):
+        frame = FlexFrame(5, "10%").resolve(200, 100)
+        self.assertEqual(frame.width, 40)
+        self.assertEqual(frame.height, 10)
+        self.assertEqual(frame.left, 20)
+
+    def test_frames_do_not_share_values(self):
+        first, second = FlexFrame(5), FlexFrame("10%")
+        self.assertEqual(first.top, FlexMeasurement(5, 0))
+        self.assertEqual(second.top, FlexMeasurement(0, 0.1))
+        self.assertFalse(hasattr(first, "__dict__"))
+
+
+class ImmutableFlexMeasurementTestCase(unittest.TestCase):
+    def test_immutable(self):
+        measurement = FlexMeasurement.parse("50%")
+        with self.assertRaises(AttributeError):
+            measurement._relative = 1
+
+    def test_literals_are_interned(self):
+        for value in (None, 0, 10, 2.5, "50%", "10"):
+            self.assertIs(FlexMeasurement.parse(value), FlexMeasurement.parse(value))
+
+    def test_sums_are_interned(self):
+        self.assertIs(FlexMeasurement.parse(5) + "10%", FlexMeasurement.parse("10%") + 5)
+
+    def test_resolve(self):
+        self.assertEqual(FlexMeasurement.parse("50%").resolve(300), 150)
+        self.assertEqual(FlexMeasurement.parse(20).resolve(300), 20)
+        self.assertEqual(float(FlexMeasurement.parse(20)), 20)
+        with self.assertRaises(Exception):
+            float(FlexMeasurement.parse("50%"))
+
+    def test_hashable(self):
+        self.assertEqual(len({FlexMeasurement(10, 0), FlexMeasurement(10, 0), FlexMeasurement(0, 0.1)}), 2)
+
+    def test_frame_immutable(self):
+        frame = FlexFrame(5)
+        with self.assertRaises(AttributeError):
+            frame.top = 10
+
+    def test_frames_are_interned(self):
+        self.assertIs(FlexFrame.parse((5, "10%")), FlexFrame.parse((5, "10%")))
+        self.assertIs(FlexFrame.parse(5) + FlexFrame.parse(5), FlexFrame.parse(10))
+
+    def test_min_max_resolve_against_base(self):
+        self.assertEqual(FlexMeasurement.min(FlexMeasurement.parse("50%"), FlexMeasurement.parse(80), base=200), 80)
+        self.assertEqual(FlexMeasurement.max(FlexMeasurement.parse("50%"), FlexMeasurement.parse(None), base=200), 100)
+        self.assertIsNone(FlexMeasurement.min(FlexMeasurement.parse(None), base=200))
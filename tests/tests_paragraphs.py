@@ -0,0 +1,67 @@
+import unittest
+from io import BytesIO
+
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfgen.canvas import Canvas
+
+from flexbox import FlexParagraph
+from flexbox import paragraphs
+from flexbox.paragraphs import paragraph_cache_info, clear_paragraph_cache, style_fingerprint
+
+TEXT = "Prices include <b>VAT</b>. Goods remain the property of the seller until paid in full. " * 3
+
+
+def render(paragraph):
+    output = BytesIO()
+    canvas = Canvas(output, invariant=1, pageCompression=0)
+    paragraph.drawOn(canvas, 0, 0)
+    canvas.save()
+    return output.getvalue()
+
+
+class ParagraphCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        clear_paragraph_cache()
+        self.style = ParagraphStyle("Body", fontSize=8, leading=10)
+
+    def test_identical_paragraphs_share_lines(self):
+        first = FlexParagraph(TEXT, self.style)
+        second = FlexParagraph(TEXT, ParagraphStyle("Copy", fontSize=8, leading=10))
+        self.assertEqual(first.wrap(200, 1000), second.wrap(200, 1000))
+        self.assertIs(first.flowable.blPara, second.flowable.blPara)
+        self.assertEqual((paragraph_cache_info.hits, paragraph_cache_info.misses), (1, 1))
+
+    def test_cached_lines_draw_the_same(self):
+        first = FlexParagraph(TEXT, self.style)
+        first.wrap(200, 1000)
+        uncached = render(first)
+        second = FlexParagraph(TEXT, self.style)
+        second.wrap(200, 1000)
+        self.assertEqual(paragraph_cache_info.hits, 1)
+        self.assertEqual(render(second), uncached)
+
+    def test_width_and_style_are_part_of_the_key(self):
+        FlexParagraph(TEXT, self.style).wrap(200, 1000)
+        FlexParagraph(TEXT, self.style).wrap(300, 1000)
+        FlexParagraph(TEXT, ParagraphStyle("Large", fontSize=12, leading=14)).wrap(200, 1000)
+        FlexParagraph(TEXT + ".", self.style).wrap(200, 1000)
+        self.assertEqual((paragraph_cache_info.hits, paragraph_cache_info.misses), (0, 4))
+
+    def test_style_fingerprint_ignores_name(self):
+        self.assertEqual(style_fingerprint(self.style), style_fingerprint(ParagraphStyle("Other", fontSize=8, leading=10)))
+        self.assertNotEqual(style_fingerprint(self.style), style_fingerprint(ParagraphStyle("Body", fontSize=9)))
+
+    def test_cache_is_bounded(self):
+        limit, paragraphs.PARAGRAPH_CACHE_LIMIT = paragraphs.PARAGRAPH_CACHE_LIMIT, 2
+        try:
+            for width in (100, 200, 100, 300, 100, 200):
+                FlexParagraph(TEXT, self.style).wrap(width, 1000)
+            self.assertEqual((paragraph_cache_info.hits, paragraph_cache_info.misses), (2, 4))
+        finally:
+            paragraphs.PARAGRAPH_CACHE_LIMIT = limit
+
+    def test_clear(self):
+        FlexParagraph(TEXT, self.style).wrap(200, 1000)
+        clear_paragraph_cache()
+        FlexParagraph(TEXT, self.style).wrap(200, 1000)
+        self.assertEqual((paragraph_cache_info.hits, paragraph_cache_info.misses), (0, 1))
@@ -0,0 +1,96 @@
+import copy
+import os
+import pickle
+import unittest
+
+from reportlab.lib.styles import ParagraphStyle
+
+from flexbox import FlexBox, FlexItem, FlexParagraph, FlexImage, FlexWrap, FlexDirection, JustifyContent
+from flexbox.batch import render_document, render_documents
+
+
+image_path = os.path.join(os.path.dirname(__file__), os.pardir, "demo", "images", "GHS01.jpg")
+style = ParagraphStyle("Body", fontSize=9, leading=11)
+
+
+def document(rows):
+    return [
+        FlexBox(
+            *[
+                FlexBox(
+                    FlexParagraph("Row <b>%d</b>, cell %d" % (row, cell), style),
+                    FlexItem(width="40%", height=12, background_color="#e77f24", margin=2),
+                    FlexImage(image_path, height=30) if cell == 0 else FlexItem(height=30),
+                    flex_direction=FlexDirection.Column,
+                    border=1,
+                    padding=2,
+                    border_color="#88499c",
+                    width="25%"
+                )
+                for row in range(rows) for cell in range(4)
+            ],
+            flex_wrap=FlexWrap.Wrap,
+            justify_content=JustifyContent.SpaceBetween
+        )
+    ]
+
+
+def dumps(obj):
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class PickleTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        box, = document(3)
+        box.wrap(400, 1000)
+        restored = pickle.loads(dumps(box))
+
+        self.assertIs(restored.flex_wrap, FlexWrap.Wrap)
+        self.assertIs(restored.justify_content, JustifyContent.SpaceBetween)
+        cell = restored.items[0]
+        self.assertEqual(cell.border, box.items[0].border)
+        self.assertEqual(cell.border_color, box.items[0].border_color)
+        self.assertEqual(cell.items[1].flex_width, box.items[0].items[1].flex_width)
+        self.assertIsNone(cell.layout)
+        self.assertEqual(restored.wrap(400, 1000), box.wrap(400, 1000))
+
+    def test_deepcopy(self):
+        box, = document(2)
+        box.wrap(400, 1000)
+        duplicate = copy.deepcopy(box)
+        self.assertIsNot(duplicate.items[0], box.items[0])
+        self.assertEqual(duplicate.wrap(400, 1000), box.wrap(400, 1000))
+
+    def test_derived_state_is_not_pickled(self):
+        box, = document(20)
+        size = len(dumps(box))
+        box.wrap(400, 1000)
+        box.split(400, 300)
+        self.assertEqual(len(dumps(box)), size)
+        # Paragraph fragments and style fingerprints would be several kilobytes per cell.
+        self.assertLess(size, 600 * len(box.items))
+
+    def test_split_part_keeps_its_own_items(self):
+        box, = document(10)
+        box.wrap(400, 1000)
+        first, second = box.split(400, 300)
+        self.assertEqual(len(pickle.loads(dumps(second)).items), len(second.items))
+
+    def test_stream_is_not_picklable(self):
+        with self.assertRaises(TypeError):
+            dumps(FlexBox(stream=iter(())))
+
+    def test_same_document_after_round_trip(self):
+        self.assertEqual(
+            render_document(pickle.loads(dumps(document(30))), invariant=True),
+            render_document(document(30), invariant=True)
+        )
+
+
+class RenderDocumentsTestCase(unittest.TestCase):
+    def test_render_documents(self):
+        stories = [document(rows) for rows in (1, 20, 5)]
+        self.assertEqual(
+            render_documents(stories, workers=2, invariant=True),
+            [render_document(document(rows), invariant=True) for rows in (1, 20, 5)]
+        )
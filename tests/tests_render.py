@@ -0,0 +1,309 @@
+import random
+import unittest
+from bisect import bisect_left
+from itertools import product
+
+from reportlab.lib.colors import Color, toColor
+from reportlab.platypus import Flowable
+
+from flexbox import FlexBox, FlexItem, FlexFlowable, FlexWrap, FlexDirection, JustifyContent, AlignItems
+from flexbox.flex import border_path, border_paths
+from flexbox.render import BatchRenderer
+
+
+class RecordingPath:
+    def __init__(self):
+        self.subpaths = []
+
+    def rect(self, x, y, width, height):
+        self.subpaths.append(([(x, y), (x + width, y), (x + width, y + height), (x, y + height)], True))
+
+    def moveTo(self, x, y):
+        self.subpaths.append(([(x, y)], False))
+
+    def lineTo(self, x, y):
+        self.subpaths[-1][0].append((x, y))
+
+
+class RecordingCanvas:
+    """
+    Records every paint operation as the color it paints and the axis aligned rectangles it covers, in absolute
+    coordinates. Strokes are butt capped and mitred, as the canvas draws them by default.
+    """
+    def __init__(self):
+        self.paints = []
+        self.state = [(0, 0, (0, 0, 0, 1), (0, 0, 0, 1), 1, 0)]
+
+    def saveState(self):
+        self.state.append(self.state[-1])
+
+    def restoreState(self):
+        self.state.pop()
+
+    def update(self, index, value):
+        state = list(self.state[-1])
+        state[index] = value
+        self.state[-1] = tuple(state)
+
+    def translate(self, dx, dy):
+        x, y = self.state[-1][:2]
+        self.update(0, x + dx)
+        self.update(1, y + dy)
+
+    def setFillColor(self, color):
+        self.update(2, tuple(color.rgba()))
+
+    def setStrokeColor(self, color):
+        self.update(3, tuple(color.rgba()))
+
+    def setLineWidth(self, width):
+        self.update(4, width)
+
+    def setLineJoin(self, join):
+        self.update(5, join)
+
+    def beginPath(self):
+        return RecordingPath()
+
+    def rect(self, x, y, width, height, stroke=1, fill=0):
+        path = self.beginPath()
+        path.rect(x, y, width, height)
+        self.drawPath(path, stroke, fill)
+
+    def line(self, x1, y1, x2, y2):
+        path = self.beginPath()
+        path.moveTo(x1, y1)
+        path.lineTo(x2, y2)
+        self.drawPath(path)
+
+    def drawPath(self, path, stroke=1, fill=0):
+        ox, oy, fill_color, stroke_color, width, join = self.state[-1]
+        if fill:
+            rects = []
+            for points, closed in path.subpaths:
+                xs, ys = [x for x, _ in points], [y for _, y in points]
+                rects.append((ox + min(xs), oy + min(ys), ox + max(xs), oy + max(ys)))
+            self.paint(fill_color, rects)
+        if stroke:
+            rects = []
+            for points, closed in path.subpaths:
+                points = [(ox + x, oy + y) for x, y in points]
+                segments = list(zip(points, points[1:] + points[:1] if closed else points[1:]))
+                joints = points if closed else points[1:-1]
+                if joints:
+                    assert join == 0
+                for (x1, y1), (x2, y2) in segments:
+                    assert x1 == x2 or y1 == y2
+                    d = width / 2
+                    dx, dy = (d, 0) if x1 == x2 else (0, d)
+                    rects.append((min(x1, x2) - dx, min(y1, y2) - dy, max(x1, x2) + dx, max(y1, y2) + dy))
+                for x, y in joints:
+                    rects.append((x - width / 2, y - width / 2, x + width / 2, y + width / 2))
+            self.paint(stroke_color, rects)
+
+    def paint(self, color, rects):
+        self.paints.append((color, [tuple(round(v, 6) for v in rect) for rect in rects]))
+
+
+def rendered(*canvases):
+    """
+    What the paints of each canvas look like: for every cell of a grid through all of their edges, the colors painted
+    over it since the last opaque one.
+    """
+    xs = sorted({x for canvas in canvases for _, rects in canvas.paints for x1, _, x2, _ in rects for x in (x1, x2)})
+    ys = sorted({y for canvas in canvases for _, rects in canvas.paints for _, y1, _, y2 in rects for y in (y1, y2)})
+
+    images = []
+    for canvas in canvases:
+        pixels = {}
+        for color, rects in canvas.paints:
+            cells = set()
+            for x1, y1, x2, y2 in rects:
+                cells.update(product(
+                    range(bisect_left(xs, x1), bisect_left(xs, x2)),
+                    range(bisect_left(ys, y1), bisect_left(ys, y2))
+                ))
+            for cell in cells:
+                pixels[cell] = (color,) if color[3] == 1 else pixels.get(cell, ()) + (color,)
+        images.append(pixels)
+    return images
+
+
+class Marker(Flowable):
+    def __init__(self, width, height):
+        super().__init__()
+        self.width = width
+        self.height = height
+
+    def wrap(self, avail_width, avail_height):
+        return self.width, self.height
+
+    def draw(self):
+        # Painted with whatever fill color is current, so state leaking out of the renderer shows.
+        self.canv.rect(0, 0, self.width, self.height, stroke=0, fill=1)
+
+
+class RuleItem(FlexItem):
+    def draw_content(self, avail_width, avail_height, requested_width, requested_height):
+        self.canv.line(0, avail_height / 2, avail_width, avail_height / 2)
+
+
+colors = ["#eeeeee", "#e77f24", "#88499c", None, Color(0, 0, 1, alpha=0.5)]
+
+
+def random_tree(generator, depth=0):
+    def style():
+        return dict(
+            background_color=generator.choice(colors),
+            border=generator.choice([0, 0, 1, [0, 0, 0.5, 0], [2, 1, 0, 3]]),
+            border_color=generator.choice(colors),
+            margin=generator.choice([0, 0, 2, [1, 2, 3, 4]]),
+            padding=generator.choice([0, 3])
+        )
+
+    items = []
+    for _ in range(generator.randint(1, 6)):
+        kind = generator.random()
+        if kind < 0.3 and depth < 3:
+            items.append(random_tree(generator, depth + 1))
+        elif kind < 0.5:
+            items.append(FlexFlowable(Marker(generator.randint(1, 20), generator.randint(1, 20)), **style()))
+        elif kind < 0.6:
+            items.append(RuleItem(width=generator.randint(5, 30), height=10, **style()))
+        else:
+            items.append(FlexItem(width=generator.choice([10, "20%", 35]), height=generator.randint(2, 20), **style()))
+
+    return FlexBox(
+        *items,
+        flex_wrap=generator.choice(list(FlexWrap)),
+        flex_direction=generator.choice([FlexDirection.Row, FlexDirection.Row, FlexDirection.Column]),
+        justify_content=generator.choice([JustifyContent.FlexStart, JustifyContent.SpaceBetween]),
+        align_items=generator.choice([AlignItems.FlexStart, AlignItems.FlexCenter]),
+        collapse_borders=generator.random() < 0.5,
+        **style()
+    )
+
+
+def uncollapsed(box):
+    box.collapse_borders = False
+    for item in box.items:
+        if isinstance(item, FlexBox):
+            uncollapsed(item)
+    return box
+
+
+def painted(box, renderer):
+    box.renderer = renderer
+    canvas = RecordingCanvas()
+    box.drawOn(canvas, 10, 20)
+    return canvas
+
+
+class BatchRendererTestCase(unittest.TestCase):
+    def test_paints_the_same(self):
+        for seed in range(40):
+            box = uncollapsed(random_tree(random.Random(seed)))
+            box.wrap(200, 1000)
+            batched, drawn = rendered(painted(box, BatchRenderer), painted(box, None))
+            self.assertEqual(batched, drawn)
+
+    def test_groups_backgrounds(self):
+        box = FlexBox(
+            *[FlexItem(width="10%", height=10, background_color=colors[i % 2]) for i in range(100)],
+            flex_wrap=FlexWrap.Wrap
+        )
+        box.wrap(100, 1000)
+
+        canvas = painted(box, BatchRenderer)
+        self.assertEqual([color for color, _ in canvas.paints], [tuple(toColor(color).rgba()) for color in colors[:2]])
+
+    def test_overlapping_siblings_are_drawn_in_order(self):
+        box = FlexBox(
+            FlexItem(width=20, height=20, background_color="#ff0000", border=1),
+            FlexItem(width=20, height=20, background_color="#00ff00", margin=[0, 0, 0, -10]),
+            FlexItem(width=20, height=20, background_color="#ff0000", border=1),
+        )
+        box.wrap(100, 100)
+        self.assertEqual(painted(box, BatchRenderer).paints, painted(box, None).paints)
+
+
+def stroke_border(border, joined, color=(0, 0, 0, 1)):
+    canvas = RecordingCanvas()
+    canvas.setStrokeColor(Color(*color))
+    for line_width, points, closed in border_paths(border, 40, 30, joined):
+        canvas.setLineWidth(line_width)
+        canvas.drawPath(border_path(canvas.beginPath(), points, closed))
+    return canvas
+
+
+class BorderTestCase(unittest.TestCase):
+    def test_uniform_border_is_one_rect(self):
+        paths = border_paths((2, 2, 2, 2), 40, 30)
+        self.assertEqual(paths, [(2, [(1, 29), (39, 29), (39, 1), (1, 1)], True)])
+
+        canvas = RecordingCanvas()
+        item = FlexItem(width=40, height=30, border=2)
+        item.wrap(100, 100)
+        item.drawOn(canvas, 0, 0)
+        self.assertEqual(len(canvas.paints), 1)
+
+    def test_joined_sides_cover_the_same_area(self):
+        widths = (0, 1, 2)
+        for border in product(widths, widths, widths, widths):
+            joined, separate = rendered(stroke_border(border, True), stroke_border(border, False))
+            self.assertEqual(joined, separate)
+
+        self.assertEqual(len(border_paths((1, 1, 0, 1), 40, 30)), 1)
+        self.assertEqual(len(border_paths((1, 2, 1, 2), 40, 30)), 4)
+
+    def test_translucent_sides_are_not_joined(self):
+        self.assertEqual(len(stroke_border((1, 1, 1, 1), True, (0, 0, 0, 0.5)).paints), 1)
+        self.assertEqual(len(border_paths((1, 1, 1, 1), 40, 30, joined=False)), 4)
+
+    def test_collapse_shared_edges(self):
+        def grid(collapse_borders):
+            box = FlexBox(
+                *[FlexItem(width="25%", height=10, border=1) for _ in range(8)],
+                flex_wrap=FlexWrap.Wrap, collapse_borders=collapse_borders
+            )
+            box.wrap(100, 100)
+            return box
+
+        collapsed = grid(True).collapsed_borders()
+        self.assertEqual(collapsed[:5], [None, (False, False, False, True), (False, False, False, True),
+                                         (False, False, False, True), (True, False, False, False)])
+        self.assertEqual(collapsed[5], (True, False, False, True))
+
+        collapsed, full, drawn = rendered(
+            painted(grid(True), BatchRenderer), painted(grid(False), BatchRenderer), painted(grid(True), None)
+        )
+        self.assertNotEqual(collapsed, full)
+        # Ignored by FlexItem.draw, where every item draws its full border.
+        self.assertEqual(drawn, full)
+
+    def test_collapsed_backgrounds_meet_the_shared_edges(self):
+        box = FlexBox(
+            *[FlexItem(width="25%", height=20, border=2, background_color="#eeeeee") for _ in range(8)],
+            flex_wrap=FlexWrap.Wrap, collapse_borders=True
+        )
+        box.wrap(100, 100)
+
+        for renderer in (None, BatchRenderer):
+            canvas = painted(box, renderer)
+            xs = {x for _, rects in canvas.paints for x1, _, x2, _ in rects for x in (x1, x2)}
+            ys = {y for _, rects in canvas.paints for _, y1, _, y2 in rects for y in (y1, y2)}
+            self.assertEqual((min(xs), max(xs), min(ys), max(ys)), (10, 110, 20, 60))
+            # Every part of the grid is painted, by a border or a background.
+            pixels, = rendered(canvas)
+            self.assertEqual(len(pixels), (len(xs) - 1) * (len(ys) - 1))
+
+    def test_collapse_needs_same_border(self):
+        box = FlexBox(
+            FlexItem(width=10, height=10, border=1),
+            FlexItem(width=10, height=10, border=2),
+            FlexItem(width=10, height=10, border=2, border_color="#ff0000"),
+            FlexItem(width=10, height=10, border=2, margin=[0, 0, 0, 1]),
+            collapse_borders=True
+        )
+        box.wrap(100, 100)
+        self.assertEqual(box.collapsed_borders(), [None] * 4)
@@ -0,0 +1,248 @@
+import random
+import unittest
+
+from flexbox import FlexBox, FlexItem, FlexWrap, FlexDirection, JustifyContent, AlignItems
+from flexbox.rows import measure_rows, FlexPages, ItemView
+
+
+def reference_rows(main_lengths, cross_lengths, available):
+    # The row breaking algorithm FlexBox used before rows became index ranges.
+    rows = []
+    row = []
+    row_length = 0
+    for index, length in enumerate(main_lengths):
+        row_length += length
+        if row_length > available and row:
+            rows.append(row)
+            row = []
+            row_length = length
+        row.append(index)
+    rows.append(row)
+
+    return [
+        (
+            row[0],
+            row[-1] + 1,
+            sum(main_lengths[i] for i in row),
+            max(cross_lengths[i] for i in row)
+        )
+        for row in rows
+    ]
+
+
+def random_lengths(count, seed):
+    generator = random.Random(seed)
+    return (
+        tuple(generator.choice((0.0, 10.0, 33.3, 0.1, 120.5, generator.uniform(0, 80))) for _ in range(count)),
+        tuple(generator.uniform(0, 50) for _ in range(count))
+    )
+
+
+class MeasureRowsTestCase(unittest.TestCase):
+    def test_matches_reference(self):
+        for seed in range(20):
+            main, cross = random_lengths(500, seed)
+            for available in (0, 50, 99.9, 100, 1000, 10 ** 6):
+                self.assertEqual(measure_rows(main, cross, available, True), reference_rows(main, cross, available))
+
+    def test_no_wrap(self):
+        main, cross = random_lengths(50, 1)
+        self.assertEqual(measure_rows(main, cross, 100, False), [(0, 50, sum(main), max(cross))])
+
+
+class FlexRowTestCase(unittest.TestCase):
+    def test_rows_are_ranges_over_items(self):
+        items = [FlexItem(width=40, height=10) for _ in range(5)]
+        box = FlexBox(*items, flex_wrap=FlexWrap.Wrap)
+        box.wrap(100, 100)
+
+        self.assertEqual([(row.start, row.stop) for row in box.rows], [(0, 2), (2, 4), (4, 5)])
+        self.assertIs(box.rows[1].items, box.items)
+        self.assertEqual(list(box.rows[1]), items[2:4])
+        self.assertIs(box.rows[2][0], items[4])
+        self.assertEqual(list(box.rows[0][-1:]), items[1:2])
+
+
+def reference_fit(heights, avail_height):
+    # The linear scan FlexBox.split used before the page-break index.
+    height = 0
+    index = 0
+    for length in heights:
+        height += length
+        if not height < avail_height:
+            break
+        index += 1
+    return index
+
+
+class ItemViewTestCase(unittest.TestCase):
+    def test_view(self):
+        items = tuple(range(10))
+        view = ItemView(items, 2, 8)
+        self.assertEqual(len(view), 6)
+        self.assertEqual(list(view), [2, 3, 4, 5, 6, 7])
+        self.assertEqual(view[-1], 7)
+        self.assertEqual(view[::2], [2, 4, 6])
+        self.assertFalse(ItemView(items, 4, 4))
+
+    def test_views_of_views_share_items(self):
+        items = tuple(range(10))
+        view = ItemView(ItemView(items, 2, 8), 1, 4)
+        self.assertIs(view.items, items)
+        self.assertEqual((view.start, view.stop), (3, 6))
+        self.assertIs(view[1:].items, items)
+        self.assertEqual(list(view[1:]), [4, 5])
+        self.assertEqual(list(view[5:1]), [])
+
+
+class FlexPagesTestCase(unittest.TestCase):
+    def test_fit_matches_scan(self):
+        for seed in range(10):
+            lengths, heights = random_lengths(300, seed)
+            pages = FlexPages(tuple(range(300)), lengths, heights, rows=False)
+            for start in (0, 1, 17, 150, 299):
+                for avail_height in (0, 1, 25, 100, 1000, 10 ** 6):
+                    self.assertEqual(
+                        pages.fit(start, 300, avail_height) - start,
+                        reference_fit(heights[start:], avail_height)
+                    )
+
+    def test_size(self):
+        pages = FlexPages(tuple(range(5)), (10.0, 50.0, 20.0, 30.0, 5.0), (1.0, 2.0, 4.0, 8.0, 16.0), rows=False)
+        self.assertEqual(pages.size(0, 5), (50.0, 31.0))
+        self.assertEqual(pages.size(2, 5), (30.0, 28.0))
+        self.assertEqual(pages.size(2, 4), (30.0, 12.0))
+
+    def test_paginate_long_box(self):
+        items = [FlexItem(width=50, height=10) for _ in range(1000)]
+        box = FlexBox(*items, flex_wrap=FlexWrap.Wrap, width=100)
+        box.wrap(100, 10 ** 6)
+
+        pages = []
+        while box.wrap(100, 95)[1] > 95:
+            page, box = box.split(100, 95)
+            self.assertEqual(page.wrap(100, 95), (100, 90))
+            pages.append(list(page.items))
+
+        self.assertEqual(box.wrap(100, 95), (100, 50))
+        self.assertEqual(len(pages), 55)
+        self.assertEqual(sum(pages, []) + list(box.items), items)
+        self.assertIs(box.pages, page.pages)
+
+
+class NullCanvas:
+    def saveState(self):
+        pass
+
+    def restoreState(self):
+        pass
+
+    def translate(self, x, y):
+        pass
+
+    def setStrokeColor(self, color):
+        pass
+
+
+class PlacedItem(FlexItem):
+    placed = None
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        self.placed = (x, y)
+
+
+class FlexArrangementTestCase(unittest.TestCase):
+    def test_wrap_arranges_items(self):
+        items = [FlexItem(width=40, height=10 * (i + 1)) for i in range(3)]
+        box = FlexBox(*items, flex_wrap=FlexWrap.Wrap, justify_content=JustifyContent.FlexEnd,
+                      align_items=AlignItems.FlexCenter, width=100, height=100)
+        box.wrap(100, 100)
+
+        arrangement = box.arrangement
+        self.assertEqual(len(arrangement), 3)
+        self.assertEqual(arrangement.row_lengths, (45.0, 55.0))
+        self.assertEqual(list(arrangement), [(items[0], 20.0, 72.5), (items[1], 60.0, 67.5), (items[2], 60.0, 12.5)])
+
+    def test_column_arrangement(self):
+        items = [FlexItem(width=10, height=40), FlexItem(width=20, height=40)]
+        box = FlexBox(*items, flex_direction=FlexDirection.Column, align_items=AlignItems.FlexEnd, width=50, height=80)
+        box.wrap(100, 100)
+        self.assertEqual(list(box.arrangement), [(items[0], 40.0, 40.0), (items[1], 30.0, 0.0)])
+
+    def test_draw_replays_arrangement(self):
+        items = [PlacedItem(width=40, height=10) for _ in range(3)]
+        box = FlexBox(*items, flex_wrap=FlexWrap.Wrap)
+        box.wrap(100, 100)
+
+        arrangement = box.arrangement
+        box.arrange = None
+        box.drawOn(NullCanvas(), 0, 0)
+
+        self.assertEqual([(x, y) for _, x, y in arrangement], [item.placed for item in items])
+
+    def test_restore_reuses_arrangement(self):
+        box = FlexBox(FlexItem(width="50%", height=10), FlexItem(width="50%", height=10), flex_wrap=FlexWrap.Wrap)
+        box.wrap(100, 100)
+        arrangement = box.arrangement
+        box.wrap(200, 100)
+        self.assertIsNot(box.arrangement, arrangement)
+        box.wrap(100, 100)
+        self.assertIs(box.arrangement, arrangement)
+
+    def test_empty_box(self):
+        box = FlexBox()
+        box.wrap(100, 100)
+        self.assertEqual(len(box.arrangement), 0)
+
+
+class StreamTestCase(unittest.TestCase):
+    def stream(self, count, **kwargs):
+        self.pulled = 0
+
+        def items():
+            for _ in range(count):
+                self.pulled += 1
+                yield FlexItem(**kwargs)
+
+        return items()
+
+    def paginate(self, box, avail_width, avail_height):
+        pages = []
+        while box.wrap(avail_width, avail_height)[1] > avail_height:
+            page, box = box.split(avail_width, avail_height)
+            pages.append(page)
+        return pages + [box]
+
+    def test_pulls_one_page(self):
+        box = FlexBox(stream=self.stream(1000, width=50, height=10), flex_wrap=FlexWrap.Wrap, width=100)
+        self.assertGreater(box.wrap(100, 95)[1], 95)
+        self.assertLess(self.pulled, 40)
+
+        first, second = box.split(100, 95)
+        self.assertEqual(first.wrap(100, 95), (100, 90))
+        self.assertLess(self.pulled, 40)
+        self.assertIsNone(box.stream)
+        self.assertIsNotNone(second.stream)
+
+    def test_paginate_rows(self):
+        box = FlexBox(stream=self.stream(1000, width=50, height=10), flex_wrap=FlexWrap.Wrap, width=100)
+        pages = self.paginate(box, 100, 95)
+        self.assertEqual(self.pulled, 1000)
+        self.assertEqual(len(pages), 56)
+        self.assertEqual(sum(len(page.items) for page in pages), 1000)
+        self.assertEqual([page.wrap(100, 95) for page in pages[-2:]], [(100, 90), (100, 50)])
+
+    def test_paginate_column(self):
+        box = FlexBox(FlexItem(width=20, height=10), stream=self.stream(99, width=10, height=10),
+                      flex_direction=FlexDirection.Column)
+        pages = self.paginate(box, 100, 95)
+        self.assertEqual(len(pages), 12)
+        self.assertEqual(sum(len(page.items) for page in pages), 100)
+        self.assertEqual(pages[0].wrap(100, 95), (20, 90))
+        self.assertEqual(pages[-1].wrap(100, 95), (10, 10))
+
+    def test_unsplittable_box_pulls_everything(self):
+        box = FlexBox(stream=self.stream(100, width=1, height=10), width=100)
+        self.assertEqual(box.wrap(100, 95), (100, 10))
+        self.assertEqual(self.pulled, 100)
+        self.assertEqual(len(box.items), 100)
@@ -0,0 +1,111 @@
+import unittest
+from io import BytesIO
+
+from reportlab.lib.colors import Color, HexColor
+from reportlab.pdfgen.canvas import Canvas
+
+from flexbox import FlexBox, FlexItem, BatchRenderer
+from flexbox.state import StateCanvas, state_canvas
+
+
+red = HexColor(0xff0000)
+
+
+class StateCanvasTestCase(unittest.TestCase):
+    def setUp(self):
+        self.canvas = Canvas(BytesIO())
+        self.state = StateCanvas(self.canvas)
+
+    def operators(self, *names):
+        return [code for code in self.canvas._code if code.split()[-1] in names]
+
+    def test_redundant_operators_are_left_out(self):
+        for _ in range(3):
+            self.state.setFillColor(red)
+            self.state.setStrokeColor(red)
+            self.state.setLineWidth(0.5)
+            self.state.setLineJoin(1)
+            self.state.setLineCap(2)
+        self.assertEqual(self.canvas._code, ["1 0 0 rg", "1 0 0 RG", ".5 w", "1 j", "2 J"])
+
+    def test_defaults_are_left_out(self):
+        self.state.setFillColor(HexColor(0x000000))
+        self.state.setStrokeColor(Color(0, 0, 0))
+        self.state.setLineWidth(1)
+        self.state.setLineJoin(0)
+        self.state.setLineCap(0)
+        self.assertEqual(self.canvas._code, [])
+
+    def test_restored_state(self):
+        self.state.setStrokeColor(red)
+        self.state.saveState()
+        self.state.setStrokeColor(red)
+        self.state.setLineWidth(2)
+        self.state.restoreState()
+        self.state.setStrokeColor(red)
+        self.state.setLineWidth(2)
+        self.assertEqual(self.canvas._code, ["1 0 0 RG", "q", "2 w", "Q", "2 w"])
+
+    def test_state_changed_on_the_canvas(self):
+        self.state.setFillColor(red)
+        self.canvas.setFillColorRGB(0, 0, 1)
+        self.state.setFillColor(red)
+        self.assertEqual(self.operators("rg"), ["1 0 0 rg", "0 0 1 rg", "1 0 0 rg"])
+
+        self.state.setFillGray(0.5)
+        self.state.setFillColor(Color(0.5, 0.5, 0.5))
+        self.assertEqual(self.operators("rg", "g"), ["1 0 0 rg", "0 0 1 rg", "1 0 0 rg", ".5 g"])
+
+    def test_alpha_changed_on_the_canvas(self):
+        self.state.setFillColor(red)
+        self.canvas.setFillAlpha(0.5)
+        self.state.setFillColor(red)
+        self.assertEqual(self.operators("rg"), ["1 0 0 rg"])
+        self.assertEqual(self.canvas._extgstate.getValue("ca"), 1)
+
+    def test_translucent_colors(self):
+        self.state.setStrokeColor(Color(1, 0, 0, 0.5))
+        self.state.setStrokeColor(Color(1, 0, 0, 1))
+        self.assertEqual(self.operators("RG"), ["1 0 0 RG", "1 0 0 RG"])
+
+    def test_attributes_are_set_on_the_canvas(self):
+        line = self.state.line
+        self.state.line = print
+        self.assertIs(self.canvas.line, print)
+        self.assertIs(self.state.line, print)
+        self.state.line = line
+        self.state._cropMarks = True
+        self.assertTrue(self.canvas._cropMarks)
+
+    def test_state_canvas(self):
+        self.assertIs(state_canvas(self.state), self.state)
+        self.assertIsInstance(state_canvas(self.canvas), StateCanvas)
+        other = object()
+        self.assertIs(state_canvas(other), other)
+
+
+class DrawTestCase(unittest.TestCase):
+    def grid(self, renderer=None):
+        box = FlexBox(
+            *[FlexItem(width=10, height=10, border=0.5, background_color=red) for _ in range(10)],
+            border=0.5, renderer=renderer
+        )
+        box.wrap(100, 100)
+        return box
+
+    def test_items_share_the_state(self):
+        canvas = Canvas(BytesIO())
+        self.grid().drawOn(canvas, 0, 0)
+        codes = [code.split()[-1] for code in canvas._code]
+        self.assertEqual(codes.count("RG"), 0)
+        self.assertEqual(codes.count("rg"), 10)
+        self.assertEqual(codes.count("w"), 11)
+        self.assertEqual(codes.count("q"), codes.count("Q"))
+
+    def test_renderer(self):
+        canvas = Canvas(BytesIO())
+        self.grid(BatchRenderer).drawOn(canvas, 0, 0)
+        codes = [code.split()[-1] for code in canvas._code]
+        self.assertEqual(codes.count("RG"), 0)
+        self.assertEqual(codes.count("rg"), 1)
+        self.assertEqual(codes.count("j"), 0)
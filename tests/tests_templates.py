@@ -0,0 +1,117 @@
+import json
+import os
+import unittest
+
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import Paragraph
+
+from flexbox import FlexBox, FlexItem, FlexFlowable, FlexParagraph, FlexImage, FlexDirection, AlignItems
+from flexbox.batch import render_document
+from flexbox.templates import compile_template
+
+
+image_path = os.path.join(os.path.dirname(__file__), os.pardir, "demo", "images", "GHS01.jpg")
+body = ParagraphStyle("Body", fontSize=9, leading=11)
+
+invoice_spec = json.loads("""{
+    "flex_direction": "Column", "margin": 10, "padding": "2%", "items": [
+        {"padding": [4, 8], "border": [0, 0, 1, 0], "border_color": "#888888", "items": [
+            {"type": "paragraph", "text": "Invoice <b>{number}</b>", "style": "body"},
+            {"type": "image", "image": "{logo}", "width": 40, "height": 20}
+        ]},
+        {"type": "box", "flex_direction": "Column", "each": "lines", "items": [
+            {"align_items": "FlexCenter", "background_color": "#eeeeee", "items": [
+                {"type": "paragraph", "text": "{description}", "style": "body", "width": "60%"},
+                {"type": "paragraph", "text": "{quantity} x {currency} {price:.2f}", "style": "body"},
+                {"width": 4, "height": 4, "margin": 1, "background_color": "#e77f24", "align_self": "FlexEnd"}
+            ]}
+        ]}
+    ]
+}""")
+
+invoice_data = {
+    "number": 42,
+    "logo": image_path,
+    "currency": "EUR",
+    "lines": [{"description": "Item %d" % i, "quantity": i, "price": i * 1.5} for i in range(30)]
+}
+
+
+def construct_invoice(data):
+    return FlexBox(
+        FlexBox(
+            FlexParagraph("Invoice <b>%s</b>" % data["number"], body),
+            FlexImage(data["logo"], width=40, height=20),
+            padding=[4, 8], border=[0, 0, 1, 0], border_color="#888888"
+        ),
+        FlexBox(
+            *[
+                FlexBox(
+                    FlexParagraph(line["description"], body, width="60%"),
+                    FlexParagraph("%s x %s %.2f" % (line["quantity"], data["currency"], line["price"]), body),
+                    FlexItem(width=4, height=4, margin=1, background_color="#e77f24", align_self=AlignItems.FlexEnd),
+                    align_items=AlignItems.FlexCenter, background_color="#eeeeee"
+                )
+                for line in data["lines"]
+            ],
+            flex_direction=FlexDirection.Column
+        ),
+        flex_direction=FlexDirection.Column, margin=10, padding="2%"
+    )
+
+
+class TemplateTestCase(unittest.TestCase):
+    def test_instance_matches_constructed_tree(self):
+        template = compile_template(invoice_spec, styles={"body": body})
+        box = template.instantiate(invoice_data)
+
+        self.assertEqual(len(box.items[1].items), 30)
+        self.assertEqual(box.items[1].items[3].items[1].text, "3 x EUR 4.50")
+        self.assertEqual(box.items[0].items[1].image, image_path)
+        self.assertIs(box.items[1].items[0].align_items, AlignItems.FlexCenter)
+        self.assertEqual(
+            render_document([box], invariant=True),
+            render_document([construct_invoice(invoice_data)], invariant=True)
+        )
+
+    def test_instances_are_independent(self):
+        template = compile_template(invoice_spec, styles={"body": body})
+        first = template.instantiate(invoice_data)
+        second = template.instantiate(dict(invoice_data, number=43, lines=[]))
+
+        self.assertEqual(first.wrap(500, 800), construct_invoice(invoice_data).wrap(500, 800))
+        self.assertEqual(second.items[0].items[0].text, "Invoice <b>43</b>")
+        self.assertEqual(second.items[1].items, ())
+        self.assertIsNot(first.wrap_cache, second.wrap_cache)
+        self.assertEqual(second.wrap(500, 800), construct_invoice(dict(invoice_data, number=43, lines=[])).wrap(500, 800))
+
+    def test_custom_elements_are_independent(self):
+        class Note(FlexFlowable):
+            def __init__(self, **kwargs):
+                super().__init__(Paragraph("A note long enough to take a few lines in a narrow box", body), **kwargs)
+
+        template = compile_template({"type": "box", "items": [{"type": "note"}]}, elements={"note": Note})
+        narrow, wide = template.instantiate(), template.instantiate()
+
+        self.assertIsNot(narrow.kwargs, wide.kwargs)
+        self.assertIsNot(narrow.items[0].flowable, wide.items[0].flowable)
+        narrow_size = narrow.wrap(60, 800)
+        wide_size = wide.wrap(400, 800)
+        self.assertEqual(narrow.items[0].flowable.width, 60)
+        self.assertEqual(wide.items[0].flowable.width, 400)
+        self.assertGreater(narrow_size[1], wide_size[1])
+
+        narrow.kwargs["keep_together"] = True
+        self.assertFalse(template.instantiate().kwargs["keep_together"])
+
+    def test_static_template(self):
+        template = compile_template({"type": "paragraph", "text": "Total", "style": body, "padding": 2})
+        self.assertEqual(template.instantiate().wrap(100, 100), FlexParagraph("Total", body, padding=2).wrap(100, 100))
+
+    def test_invalid_spec(self):
+        with self.assertRaises(ValueError):
+            compile_template({"type": "table"})
+        with self.assertRaises(ValueError):
+            compile_template({"type": "box", "flex_direction": "Diagonal"})
+        with self.assertRaises(ValueError):
+            compile_template({"type": "item", "items": []})